@@ -1,11 +1,76 @@
 from b_tree import BPlusTree
-import hashlib
+from functools import lru_cache
 
+import numpy as np
 
-def chord_hash(value, m=40):
-    h = hashlib.sha1(str(value).encode()).hexdigest()
-    num = int(h, 16) % (2**m)
-    return num
+from key_hash import DEFAULT_KEY_HASH, key_hasher
+
+try:
+    from numba import njit
+except ImportError:  # optional: without numba routing walks the node objects
+    njit = None
+
+def _jit(fn):
+    # nogil: lookups on worker threads can route in parallel
+    return njit(cache=True, nogil=True)(fn) if njit is not None else fn
+
+
+def chord_hash(value, m=40, key_hash=DEFAULT_KEY_HASH):
+    # any value is keyed by its str(), so unhashable inputs still work;
+    # key_hash.key_hasher is the shared definition (data_read.hash_titles too)
+    return _hash_text(str(value), m, key_hash)
+
+
+@lru_cache(maxsize=1 << 20)
+def _hash_text(text, m, key_hash):
+    # memoized: the same titles are re-hashed by lookup/update/delete; bounded
+    # so a long run over many distinct titles can't grow it without limit
+    return key_hasher(m, key_hash)(text)
+
+
+@_jit
+def _in_arc(key, start, end):
+    """(start, end] in circular space (numeric twin of ChordRing._in_interval)."""
+    if start < end:
+        return start < key <= end
+    return key > start or key <= end
+
+
+@_jit
+def _route(start_idx, key, node_ids, fingers, max_steps):
+    """
+    find_successor over the ring arrays: node_ids is the sorted [N] id array,
+    fingers the [N, m] finger ids. Returns (node_idx, hops).
+    """
+    n = node_ids.shape[0]
+    m = fingers.shape[1]
+    curr = start_idx
+    hops = 0
+    while True:
+        cid = node_ids[curr]
+        if key == cid:
+            return curr, hops
+
+        succ = (curr + 1) % n
+        if _in_arc(key, cid, node_ids[succ]):
+            return succ, hops + 1
+
+        # closest preceding finger, scanned from the farthest one
+        nxt = curr
+        for i in range(m - 1, -1, -1):
+            fid = fingers[curr, i]
+            if _in_arc(fid, cid, key):
+                nxt = np.searchsorted(node_ids, fid)
+                break
+        if nxt == curr:
+            nxt = succ
+
+        curr = nxt
+        hops += 1
+
+        if hops > max_steps:
+            idx = np.searchsorted(node_ids, key)
+            return (idx if idx < n else 0), hops
 
 
 class ChordNode:
@@ -17,7 +82,8 @@ class ChordNode:
         self.successor = None
         self.predecessor = None
 
-        # finger table size m
+        # finger table size m: object view of the ring's _fingers row,
+        # used by the pure-Python router
         self.finger = [None] * m
 
     def __repr__(self):
@@ -25,11 +91,33 @@ class ChordNode:
 
 
 class ChordRing:
-    def __init__(self, m=160, btree_size=32):
+    def __init__(self, m=40, btree_size=32, key_hash=DEFAULT_KEY_HASH):
+        """
+        m: identifier bits, 1..64 (2**40 is already collision-free for the dataset).
+        key_hash: title -> key hash, one of key_hash.KEY_HASHES.
+        """
+        if not 1 <= m <= 64:
+            raise ValueError("ChordRing supports 1 <= m <= 64 (uint64 ids).")
+        key_hasher(m, key_hash)  # unknown / unavailable hash fails here, not on first insert
         self.m = m
+        self.key_hash = key_hash
         self.btree_size = btree_size
         self.nodes = []
 
+        # finger tables as parallel uint64 arrays: _node_ids[i] is
+        # self.nodes[i].node_id (sorted), _fingers[i, k] the id of its k-th
+        # finger. id + 2**k may wrap past 2**64, which & _mask makes exact.
+        self._use_kernel = njit is not None
+        self._mask = (1 << m) - 1
+        self._pow2 = np.array([1 << i for i in range(m)], dtype=np.uint64)
+        self._node_ids = np.empty(0, dtype=np.uint64)
+        self._fingers = np.empty((0, m), dtype=np.uint64)
+
+    @property
+    def routes_without_gil(self):
+        """True when find_successor runs the jitted, GIL-releasing _route kernel."""
+        return self._use_kernel
+
     # ------------------------- helpers -------------------------
     def _in_interval(self, key, start, end):
         """(start, end] in circular space."""
@@ -38,11 +126,27 @@ class ChordRing:
         else:
             return key > start or key <= end
 
-    def _update_links(self):
+    def _attach(self, pos, node):
+        """Insert node at sorted position pos: its id/finger rows and the two neighbour links."""
+        self.nodes.insert(pos, node)
+        self._node_ids = np.insert(self._node_ids, pos, node.node_id)
+        # unset fingers hold the node's own id, which routing never follows
+        self._fingers = np.insert(self._fingers, pos, node.node_id, axis=0)
         n = len(self.nodes)
-        for i, node in enumerate(self.nodes):
-            node.successor = self.nodes[(i + 1) % n]
-            node.predecessor = self.nodes[(i - 1) % n]
+        node.successor = self.nodes[(pos + 1) % n]
+        node.predecessor = self.nodes[(pos - 1) % n]
+        node.successor.predecessor = node
+        node.predecessor.successor = node
+
+    def _detach(self, pos):
+        """Remove and return the node at pos, relinking its neighbours."""
+        node = self.nodes.pop(pos)
+        self._node_ids = np.delete(self._node_ids, pos)
+        self._fingers = np.delete(self._fingers, pos, axis=0)
+        if self.nodes:
+            node.predecessor.successor = node.successor
+            node.successor.predecessor = node.predecessor
+        return node
 
     # ------------------------- routing -------------------------
     def find_successor(self, key, start_node=None):
@@ -60,6 +164,12 @@ class ChordRing:
         # safety bound to avoid infinite loops 
         max_steps = max(4, len(self.nodes) * 4)
 
+        if self._use_kernel:
+            ids = self._node_ids
+            start_idx = int(np.searchsorted(ids, curr.node_id))
+            idx, hops = _route(start_idx, np.uint64(key), ids, self._fingers, max_steps)
+            return self.nodes[idx], int(hops)
+
         while True:
             if key == curr.node_id:
                 return curr, hops
@@ -96,45 +206,116 @@ class ChordRing:
 
     # ------------------------- finger maintenance -------------------------
     def fix_all_fingers(self):
-        for node in self.nodes:
-            self.init_finger_table(node)
+        """Rebuild every finger table with one searchsorted over the [N, m] starts."""
+        if not self.nodes:
+            return
+        ids = self._node_ids
+        starts = (ids[:, None] + self._pow2) & self._mask
+        succ_idx = np.searchsorted(ids, starts) % len(ids)
+        self._fingers = ids[succ_idx]
+        nodes = self.nodes
+        for node, row in zip(nodes, succ_idx.tolist()):
+            node.finger = [nodes[j] for j in row]
+
+    def _update_fingers_after_join(self, new_node):
+        """
+        Incremental repair: only fingers whose start now falls in (pred, new_node]
+        change, and all of them currently point at new_node's successor.
+        """
+        rows, cols = np.nonzero(self._fingers == new_node.successor.node_id)
+        starts = (self._node_ids[rows] + self._pow2[cols]) & self._mask
+        pred_id, new_id = new_node.predecessor.node_id, new_node.node_id
+        if pred_id < new_id:
+            hit = (starts > pred_id) & (starts <= new_id)
+        else:
+            hit = (starts > pred_id) | (starts <= new_id)
+        rows, cols = rows[hit], cols[hit]
+        self._fingers[rows, cols] = new_id
+        for i, k in zip(rows.tolist(), cols.tolist()):
+            self.nodes[i].finger[k] = new_node
+        self.init_finger_table(new_node)
+
+    def _update_fingers_after_leave(self, node, succ):
+        """Incremental repair: fingers that pointed at the leaving node now point at its successor."""
+        rows, cols = np.nonzero(self._fingers == node.node_id)
+        self._fingers[rows, cols] = succ.node_id
+        for i, k in zip(rows.tolist(), cols.tolist()):
+            self.nodes[i].finger[k] = succ
 
     def init_finger_table(self, node):
-        max_id = 2**self.m
-        for i in range(self.m):
-            start = (node.node_id + 2**i) % max_id
-            successor = self.find_successor_linear(start)
-            node.finger[i] = successor
+        ids = self._node_ids
+        row = int(np.searchsorted(ids, node.node_id))
+        starts = (node.node_id + self._pow2) & self._mask
+        succ_idx = np.searchsorted(ids, starts) % len(ids)
+        self._fingers[row] = ids[succ_idx]
+        node.finger = [self.nodes[j] for j in succ_idx.tolist()]
 
     # ------------------------- data operations -------------------------
     def insert(self, key_int, record, start_node=None):
-        """Insert record under an already-hashed key."""
+        """Insert record under an already-hashed key. Returns hops."""
         node, hops = self.find_successor(key_int, start_node=start_node)
         node.btree.insert(record, key_int)
         return hops
 
+    def insert_many(self, keys, records, start_node=None):
+        """
+        Bulk insert: records[i] is stored under the already-hashed keys[i].
+        Each key is still routed for its hop count, but storage is grouped by
+        owner (one searchsorted over the ring ids) and every owner's B+ tree is
+        bulk-loaded once instead of taking one insert per record.
+        Returns np.int32 array of hops, in input order.
+        """
+        if isinstance(keys, np.ndarray):
+            keys = keys.tolist()
+        hops_out = np.empty(len(keys), dtype=np.int32)
+        if not keys:
+            return hops_out
+        find_successor = self.find_successor
+        for i, key_int in enumerate(keys):
+            hops_out[i] = find_successor(key_int, start_node=start_node)[1]
+
+        # owner of key = first node id >= key, wrapping to node 0
+        owner = np.searchsorted(self._node_ids, np.asarray(keys, dtype=np.uint64)) % len(self.nodes)
+        order = np.argsort(owner, kind="stable")
+        bounds = np.flatnonzero(np.diff(owner[order])) + 1
+        for idx in np.split(order, bounds):
+            idx = idx.tolist()
+            node = self.nodes[owner[idx[0]]]
+            node.btree.bulk_load([records[i] for i in idx], [keys[i] for i in idx])
+        return hops_out
+
     def insert_title(self, movie_title, record, start_node=None):
         """Insert by title (hash inside for safety/consistency)."""
-        key_int = chord_hash(movie_title, self.m)
+        key_int = chord_hash(movie_title, self.m, self.key_hash)
         return self.insert(key_int, record, start_node=start_node)
 
     def lookup(self, movie_title, start_node=None):
-        key_int = chord_hash(movie_title, self.m)
+        key_int = chord_hash(movie_title, self.m, self.key_hash)
+        return self.lookup_key(key_int, start_node=start_node)
+
+    def lookup_key(self, key_int, start_node=None):
+        """Lookup under an already-hashed key. Returns (records, hops)."""
         node, hops = self.find_successor(key_int, start_node=start_node)
         records = node.btree.search_key(key_int)
         return records, hops
 
     def delete_key(self, key_int, start_node=None):
+        """Returns hops."""
         node, hops = self.find_successor(key_int, start_node=start_node)
         node.btree.delete(key_int)
         return hops
 
     def delete_title(self, movie_title, start_node=None):
-        key_int = chord_hash(movie_title, self.m)
+        key_int = chord_hash(movie_title, self.m, self.key_hash)
         return self.delete_key(key_int, start_node=start_node)
 
     def update_movie_field(self, title, field, new_value, start_node=None):
-        key_int = chord_hash(title, self.m)
+        """Returns (updated, hops)."""
+        key_int = chord_hash(title, self.m, self.key_hash)
+        return self.update_key_field(key_int, field, new_value, start_node=start_node)
+
+    def update_key_field(self, key_int, field, new_value, start_node=None):
+        """update_movie_field under an already-hashed key. Returns (updated, hops)."""
         node, hops = self.find_successor(key_int, start_node=start_node)
         records = node.btree.search_key(key_int)
         if not records:
@@ -147,10 +328,10 @@ class ChordRing:
     def join_node(self, node_id, start_node=None):
         """
         Node join.
-        Returns:
-        - routing hops to locate successor of node_id
+        Returns (new_node, locate_hops, moved_cnt):
+        - new_node
+        - locate_hops: routing hops to locate successor of node_id
         - moved_cnt
-        - migrate_hops: routing hops used to move keys (sum over moved keys)
         """
         locate_hops = 0
 
@@ -159,55 +340,58 @@ class ChordRing:
             _, locate_hops = self.find_successor(node_id, start_node=start_node or self.nodes[0])
 
         new_node = ChordNode(node_id, self.m, btree_size=self.btree_size)
-        self.nodes.append(new_node)
-        self.nodes.sort(key=lambda n: n.node_id)
-        self._update_links()
+        # binary search for the slot instead of re-sorting self.nodes
+        # (side="right": an equal id lands after the existing one, as the stable sort did)
+        pos = int(np.searchsorted(self._node_ids, node_id, side="right"))
+        self._attach(pos, new_node)
 
-        migrate_hops = 0
         moved_cnt = 0
         if len(self.nodes) > 1:
-            migrate_hops, moved_cnt = self._redistribute_keys(new_node)
-
-        self.fix_all_fingers()
+            moved_cnt = self._redistribute_keys(new_node)
+            self._update_fingers_after_join(new_node)
+        else:
+            self.fix_all_fingers()
 
         return new_node, locate_hops, moved_cnt
 
     def _redistribute_keys(self, new_node):
         """
         Move keys from new_node.successor to new_node when they fall in (pred, new_node].
-        Returns (migrate_hops, moved_count).
+        Returns moved_count. Every moved key is owned by new_node by
+        construction, so no per-key routing is done for it.
         """
         pred = new_node.predecessor
         succ = new_node.successor
 
-        items = succ.btree.get_all_items()
-        total_hops = 0
-        moved = 0
+        # (pred, new_node] as key ranges of succ's tree; it wraps past 2**m - 1
+        # when new_node becomes the smallest id
+        lo, hi = pred.node_id + 1, new_node.node_id
+        if lo <= hi:
+            items = succ.btree.range_pop(lo, hi)
+        else:
+            items = succ.btree.range_pop(0, hi) + succ.btree.range_pop(lo, self._mask)
 
-        for key_int, record in items:
-            if self._in_interval(key_int, pred.node_id, new_node.node_id):
-                # count routing cost 
-                _, hops = self.find_successor(key_int, start_node=succ)
-                total_hops += hops
-                new_node.btree.insert(record, key_int)
-                succ.btree.delete(key_int)
-                moved += 1
+        if items:
+            new_node.btree.bulk_load([record for _, record in items], [key_int for key_int, _ in items])
 
-        return total_hops, moved
+        return len(items)
 
     def leave_node(self, node_id, start_node=None):
         """
         Node leave.
-        Returns:
+        Returns (ok, routing_hops, moved_cnt):
+        - ok: False if node_id is not in the ring
         - routing_hops (event): overlay routing cost for the LEAVE request
         - moved_cnt
         """
-        node = next((n for n in self.nodes if n.node_id == node_id), None)
-        if not node:
+        # self.nodes is sorted by id: binary search instead of a linear scan
+        pos = int(np.searchsorted(self._node_ids, node_id))
+        if pos == len(self.nodes) or self.nodes[pos].node_id != node_id:
             return False, 0, 0
+        node = self.nodes[pos]
 
         if len(self.nodes) == 1:
-            self.nodes.remove(node)
+            self._detach(pos)
             return True, 0, 0
 
         routing_hops = 0
@@ -218,21 +402,18 @@ class ChordRing:
         succ = node.successor
 
         # move data for correctness
-        moved = 0
         items = node.btree.get_all_items()
-        for key_int, record in items:
-            succ.btree.insert(record, key_int)
-            moved += 1
+        moved = len(items)
+        if items:
+            succ.btree.bulk_load([record for _, record in items], [key_int for key_int, _ in items])
 
-        self.nodes.remove(node)
-        self._update_links()
-        self.fix_all_fingers()
+        self._detach(pos)
+        self._update_fingers_after_leave(node, succ)
 
         return True, routing_hops, moved
 
     # ------------------------- debug -------------------------
     def print_nodes_summary(self):
         for n in self.nodes:
-            items = n.btree.get_all_items()
-            print(f"{n} keys = {len(items)}")
+            print(f"{n} keys = {len(n.btree)}")
 
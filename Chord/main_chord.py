@@ -1,36 +1,93 @@
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import os
 from pathlib import Path
 import random
-import statistics
-from threading import Thread
+import sys
+
+import numpy as np
+import pandas as pd
 
 from plot_chord import plot_main_chord_results, records_per_node_chord
 
-from data_read import load_and_preprocess_csv
-from chord import ChordRing, chord_hash
+from data_read import hash_titles, load_and_preprocess_csv, record_columns
+from hop_stats import summary
+from chord import ChordRing
+from key_hash import DEFAULT_KEY_HASH, KEY_HASHES
 
 
 # ---------------- helpers -------------------
-def _p95(values):
-    if not values:
-        return None
-    s = sorted(values)
-    idx = int(round(0.95 * (len(s) - 1)))
-    return s[idx]
-
-
 def _stats_line(name, values):
-    if not values:
+    st = summary(values)
+    if st is None:
         print(f"{name}: (no values)")
         return
+    n, avg, median, p95, lo, hi = st
     print(
-        f"{name}: n={len(values)}  avg={statistics.mean(values):.2f}  "
-        f"median={statistics.median(values):.2f}  p95={_p95(values)}  "
-        f"min={min(values)}  max={max(values)}"
+        f"{name}: n={n}  avg={avg:.2f}  "
+        f"median={median:.2f}  p95={p95}  "
+        f"min={lo}  max={hi}"
     )
 
 
+# ---------------- parallel lookups -------------------
+_lookup_ring = None
+
+
+def _init_lookup_worker(ring):
+    global _lookup_ring
+    _lookup_ring = ring
+
+
+def _lookup_movie(key_int):
+    records, hops = _lookup_ring.lookup_key(key_int)
+    if records:
+        return records[0].get("popularity"), hops
+    return None, hops
+
+
+def _lookup_executor(workers, ring):
+    """
+    Pure-Python routing only runs in parallel on threads on a free-threaded
+    build (PEP 703), or when the ring routes through the nogil numba kernel.
+    Otherwise fork worker processes, which inherit the ring without pickling
+    it. A single worker can't overlap anything, so it stays on a (reused)
+    thread instead of paying for a fork.
+    """
+    gil_bound = getattr(sys, "_is_gil_enabled", lambda: True)() and not ring.routes_without_gil
+    if workers > 1 and gil_bound and "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_lookup_worker,
+            initargs=(ring,),
+        )
+    return ThreadPoolExecutor(max_workers=workers, initializer=_init_lookup_worker, initargs=(ring,))
+
+
+# --------- CLI ------------
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Chord experiment + plots")
+    parser.add_argument("--k", type=int, default=None,
+                        help="number of titles for the parallel lookup (default: prompt, or 3 when headless)")
+    parser.add_argument("--title", action="append", default=[],
+                        help="title to look up; repeat for several (missing ones are picked randomly)")
+    parser.add_argument("--headless", action="store_true",
+                        help="never prompt (also implied when stdin is not a TTY)")
+    parser.add_argument("--key-hash", choices=KEY_HASHES, default=DEFAULT_KEY_HASH,
+                        help="title -> key hash (default: %(default)s; xxh64 needs xxhash)")
+    return parser.parse_args(argv)
+
+
 # --------- main ------------
-def main():
+def main(argv=None):
+    args = _parse_args(argv)
+    interactive = not args.headless and sys.stdin.isatty()
+    rng = random.Random()
+    _choice, _randrange = rng.choice, rng.randrange
+
     project_root = Path(".").resolve()
     data_path = project_root / "data_movies_clean.csv"
 
@@ -45,7 +102,12 @@ def main():
     joins_n = 10
     leaves_n = 10
 
-    ring = ChordRing(m=40)
+    ring = ChordRing(m=40, key_hash=args.key_hash)
+    print(f"Keys: {ring.key_hash}, m={ring.m}\n")
+    # hash the whole title column once; reused by the insert and delete phases
+    df["_key"] = hash_titles(df["title"], m=ring.m, key_hash=ring.key_hash)
+    key_of = dict(zip(df["title"].astype(str).tolist(), df["_key"].tolist()))
+
     # -------- initial nodes with random unique IDs --------
     N0 = num_nodes
     space = 2 ** ring.m
@@ -56,18 +118,12 @@ def main():
     node_ids = [(i * max_hash) // num_nodes for i in range(1, num_nodes + 1)]
 
     print("=== Joining initial Chord nodes ===")
-    join_hops_list = []
-    moved_list = []
+    join_hops_list = array("i")
+    moved_list = array("i")
     for nid in node_ids:
-        ret = ring.join_node(nid)
-        if isinstance(ret, tuple) and len(ret) >= 3:
-            hops, moved = ret[1], ret[2]
-        elif isinstance(ret, tuple) and len(ret) == 2:
-            hops, moved = ret[1], 0
-        else:
-            hops, moved = int(ret), 0
-        join_hops_list.append(int(hops))
-        moved_list.append(int(moved) if moved is not None else 0)
+        _, hops, moved = ring.join_node(nid)
+        join_hops_list.append(hops)
+        moved_list.append(moved)
 
     if hasattr(ring, "print_nodes_summary"):
         ring.print_nodes_summary()
@@ -76,45 +132,32 @@ def main():
 
     # -------- Insert all movies --------
     print("\n=== Inserting movies into Chord ===")
-    insert_hops = []
-    for _, row in df.iterrows():
-        title = str(row["title"])
-        key = chord_hash(title, m=ring.m)
-        ret = ring.insert(key, row.to_dict())
-        hops = ret[1] if isinstance(ret, tuple) else ret
-        insert_hops.append(int(hops))
+    records = df[record_columns(df)].to_dict(orient="records")
+    insert_hops = ring.insert_many(df["_key"].to_numpy(), records)
 
     if hasattr(ring, "print_nodes_summary"):
         ring.print_nodes_summary()
     _stats_line("Insert hops", insert_hops)
 
     load_after_inserts = records_per_node_chord(ring)
-    load_after_inserts.sort(key=lambda x: x[0])
 
     # -------- 10 Dynamic JOINS --------
     print("\n=== Dynamic JOIN x10 (Chord) ===")
-    join_moved_list = []
-    join_total_hops_list = []
+    join_moved_list = array("i")
+    join_total_hops_list = array("i")
 
-    existing = set(getattr(n, "node_id", getattr(n, "id", None)) for n in getattr(ring, "nodes", []))
+    existing = {n.node_id for n in ring.nodes}
     for _ in range(joins_n):
-        nid = random.randrange(0, space)
+        nid = _randrange(0, space)
         while nid in existing:
-            nid = random.randrange(0, space)
+            nid = _randrange(0, space)
         existing.add(nid)
 
-        ret = ring.join_node(nid)
-
-        if isinstance(ret, tuple) and len(ret) >= 3:
-            locate_hops, moved = ret[1], ret[2]
-        elif isinstance(ret, tuple) and len(ret) == 2:
-            locate_hops, moved = ret[1], 0
-        else:
-            locate_hops, moved = int(ret), 0
+        _, locate_hops, moved = ring.join_node(nid)
 
         # total hops for JOIN 
-        join_total_hops_list.append(int(locate_hops))
-        join_moved_list.append(int(moved) if moved is not None else 0)
+        join_total_hops_list.append(locate_hops)
+        join_moved_list.append(moved)
 
     _stats_line("Join total hops", join_total_hops_list)
     _stats_line("Join moved records", join_moved_list)
@@ -122,37 +165,28 @@ def main():
         ring.print_nodes_summary()
 
     load_after_join = records_per_node_chord(ring)
-    load_after_join.sort(key=lambda x: x[0])
 
     # -------- 10 Dynamic LEAVES --------
     print("\n=== Dynamic LEAVE x10 (Chord) ===")
-    leave_moved_list = []
-    leave_total_hops_list = []
+    leave_moved_list = array("i")
+    leave_total_hops_list = array("i")
 
     leaves_done = 0
     safety = 0
     while leaves_done < leaves_n and len(getattr(ring, "nodes", [])) > 2 and safety < 2000:
         safety += 1
-        leave_node = random.choice(ring.nodes[1:])
-        leave_id = getattr(leave_node, "node_id", getattr(leave_node, "id", None))
+        leave_node = _choice(ring.nodes[1:])
 
-        if "start_node" in ring.leave_node.__code__.co_varnames:
-            start = random.choice([n for n in ring.nodes if n is not leave_node])
-            ret = ring.leave_node(leave_id, start_node=start)
-        else:
-            ret = ring.leave_node(leave_id)
-
-        if isinstance(ret, tuple) and len(ret) >= 3:
-            ok, routing_hops, moved = ret[0], ret[1], ret[2]
-        elif isinstance(ret, tuple) and len(ret) == 2:
-            ok, routing_hops, moved = True, ret[1], 0
-        else:
-            ok, routing_hops, moved = True, int(ret), 0
+        # rejection sampling: uniform over the other nodes without building a list
+        start = _choice(ring.nodes)
+        while start is leave_node:
+            start = _choice(ring.nodes)
+        ok, routing_hops, moved = ring.leave_node(leave_node.node_id, start_node=start)
 
         # total hops for LEAVE 
         if ok:
-            leave_total_hops_list.append(int(routing_hops))
-            leave_moved_list.append(int(moved) if moved is not None else 0)
+            leave_total_hops_list.append(routing_hops)
+            leave_moved_list.append(moved)
             leaves_done += 1
 
     print(f"Leaves done={leaves_done}/{leaves_n}")
@@ -162,24 +196,18 @@ def main():
         ring.print_nodes_summary()
 
     load_after_leave = records_per_node_chord(ring)
-    load_after_leave.sort(key=lambda x: x[0])
 
     # -------- UPDATE (2000) --------
     print("\n=== UPDATE (Chord) ===")
-    all_titles = df["title"].dropna().astype(str).tolist()
-    unique_titles = list(dict.fromkeys(all_titles))
+    unique_titles = pd.unique(df["title"].dropna().astype(str)).tolist()
+    sample_rng = np.random.default_rng()
 
-    update_hops = []
+    update_total = min(updates_n, len(unique_titles))
+    update_hops = np.empty(update_total, dtype=np.int32)
     update_ok = 0
-    for t in random.sample(unique_titles, k=min(updates_n, len(unique_titles))):
-        ret = ring.update_movie_field(t, "popularity", 9.5)
-        if isinstance(ret, tuple):
-            ok = bool(ret[0]) if isinstance(ret[0], bool) else True
-            hops = ret[1] if len(ret) > 1 else 0
-        else:
-            ok = True
-            hops = ret
-        update_hops.append(int(hops))
+    for i, ti in enumerate(sample_rng.choice(len(unique_titles), size=update_total, replace=False).tolist()):
+        ok, hops = ring.update_key_field(key_of[unique_titles[ti]], "popularity", 9.5)
+        update_hops[i] = hops
         if ok:
             update_ok += 1
 
@@ -188,58 +216,53 @@ def main():
 
     # -------- DELETE (2000) --------
     print("\n=== DELETE (Chord) ===")
-    delete_hops = []
-    for t in random.sample(unique_titles, k=min(deletes_n, len(unique_titles))):
-        if hasattr(ring, "delete_title"):
-            ret = ring.delete_title(t)
-            hops = ret[1] if isinstance(ret, tuple) else ret
-        else:
-            key = chord_hash(t, m=ring.m)
-            ret = ring.delete(key)
-            hops = ret[1] if isinstance(ret, tuple) else ret
-        delete_hops.append(int(hops))
+    delete_total = min(deletes_n, len(unique_titles))
+    delete_hops = np.empty(delete_total, dtype=np.int32)
+    for i, ti in enumerate(sample_rng.choice(len(unique_titles), size=delete_total, replace=False).tolist()):
+        delete_hops[i] = ring.delete_key(key_of[unique_titles[ti]])
 
     print(f"Deletes attempted={len(delete_hops)}")
     _stats_line("Delete hops", delete_hops)
 
     # -------- Concurrent lookups demo --------
-    def lookup_movie(title, ring_obj, results_dict):
-        records, hops = ring_obj.lookup(title)
-        if records:
-            results_dict[title] = (records[0].get("popularity"), hops)
-        else:
-            results_dict[title] = (None, hops)
-
-    try:
-        K = int(input("Dwse K (plh8os titlwn gia parallel lookup) [default=3]: ").strip() or "3")
-    except ValueError:
+    if args.k is not None:
+        K = args.k
+    elif args.title:
+        K = len(args.title)
+    elif interactive:
+        try:
+            K = int(input("Dwse K (plh8os titlwn gia parallel lookup) [default=3]: ").strip() or "3")
+        except ValueError:
+            K = 3
+    else:
         K = 3
 
-    all_titles = df["title"].dropna().astype(str).tolist()
-    titles_set = set(all_titles)
+    # load_and_preprocess_csv already stores titles as str; only index this
+    all_titles = df["title"].dropna().to_numpy(dtype=object)
 
     titles_to_lookup = []
     for i in range(K):
-        user_title = input(f'Dwse titlo #{i+1} (Enter gia tyxaio): ').strip()
+        if i < len(args.title):
+            user_title = args.title[i].strip()
+        elif interactive:
+            user_title = input(f'Dwse titlo #{i+1} (Enter gia tyxaio): ').strip()
+        else:
+            user_title = ""
         if not user_title:
-            titles_to_lookup.append(random.choice(all_titles))
-        elif user_title in titles_set:
+            titles_to_lookup.append(_choice(all_titles))
+        elif user_title in key_of:  # title -> key map doubles as the membership index
             titles_to_lookup.append(user_title)
         else:
             print(f'  (Den vrethhke akribws o titlos "{user_title}", epilegw tyxaia apo to dataset)')
-            titles_to_lookup.append(random.choice(all_titles))
+            titles_to_lookup.append(_choice(all_titles))
 
-    results = {}
-    threads = []
-    for title in titles_to_lookup:
-        t = Thread(target=lookup_movie, args=(title, ring, results))
-        threads.append(t)
-        t.start()
-    for t in threads:
-        t.join()
+    workers = max(1, min(K, os.cpu_count() or 1))
+    with _lookup_executor(workers, ring) as ex:
+        lookup_keys = [key_of[t] for t in titles_to_lookup]
+        results = dict(zip(titles_to_lookup, ex.map(_lookup_movie, lookup_keys)))
 
     print("\n=== Popularities of K movies (Chord) ===")
-    lookup_hops = []
+    lookup_hops = array("i")
     for title, (popularity, hops) in results.items():
         lookup_hops.append(hops)
         if popularity is not None:
@@ -1,17 +1,18 @@
 from pathlib import Path
 import matplotlib.pyplot as plt
+import numpy as np
 
 
 def records_per_node_chord(ring):
     """
-    Returns list of (node_id, record_count).
+    Returns a record array of (nid, cnt) = (node_id, record_count), sorted by nid.
     Tries common storage access patterns.
     """
     out = []
     for n in getattr(ring, "nodes", []):
         cnt = 0
-        if hasattr(n, "btree") and hasattr(n.btree, "get_all_items"):
-            cnt = len(n.btree.get_all_items())
+        if hasattr(n, "btree") and hasattr(n.btree, "__len__"):
+            cnt = len(n.btree)  # maintained counter, no item list
         elif hasattr(n, "data") and isinstance(n.data, dict):
             try:
                 cnt = sum(len(v) for v in n.data.values())
@@ -24,7 +25,10 @@ def records_per_node_chord(ring):
                 cnt = len(n.storage)
 
         out.append((getattr(n, "node_id", getattr(n, "id", None)), cnt))
-    return out
+
+    arr = np.array(out, dtype=[("nid", np.uint64), ("cnt", np.int64)])  # uint64 ids, as ChordRing._node_ids
+    arr.sort(order="nid")
+    return arr.view(np.recarray)
 
 
 def plot_main_chord_results(
@@ -46,7 +50,7 @@ def plot_main_chord_results(
 
     # hops distributions
     def _hist(vals, title, fname):
-        if not vals:
+        if len(vals) == 0:
             return
         fig = plt.figure(figsize=(8.2, 5.0))
         ax = fig.add_subplot(111)
@@ -68,7 +72,7 @@ def plot_main_chord_results(
 
     # load balancing - records per node
     def _load_bar(load, title, fname):
-        if not load:
+        if len(load) == 0:
             return
         counts = [x[1] for x in load]
         fig = plt.figure(figsize=(10.5, 5.2))
@@ -162,7 +166,7 @@ def plot_main_chord_results(
     avg_ops = []
     for op in op_names:
         vals = ops.get(op, [])
-        avg_ops.append((sum(vals) / len(vals)) if vals else 0.0)
+        avg_ops.append((sum(vals) / len(vals)) if len(vals) else 0.0)
 
     fig = plt.figure(figsize=(4.8, 4.0))
     ax = fig.add_subplot(111)
@@ -9,33 +9,36 @@ Returns:
 
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass
 import random
-import statistics
-from typing import Any, Callable, Dict, List, Optional, Tuple
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
 
 from chord import ChordRing, chord_hash
+from data_read import hash_titles, record_columns
+from hop_stats import summary
+from key_hash import DEFAULT_KEY_HASH
 from pastry import PastryRing
 
 
 # ---------- stats ----------
-def _p95(vals: List[float]) -> Optional[float]:
-    if not vals:
-        return None
-    s = sorted(vals)
-    return float(s[int(round(0.95 * (len(s) - 1)))])
-
-
-def summarize(vals: List[float]) -> Dict[str, Any]:
-    if not vals:
+def summarize(vals: Sequence[float]) -> Dict[str, Any]:
+    st = summary(vals)
+    if st is None:
         return {"n": 0, "avg": None, "median": None, "p95": None, "min": None, "max": None}
+    n, avg, median, p95, lo, hi = st
     return {
-        "n": len(vals),
-        "avg": float(statistics.mean(vals)),
-        "median": float(statistics.median(vals)),
-        "p95": _p95(vals),
-        "min": float(min(vals)),
-        "max": float(max(vals)),
+        "n": n,
+        "avg": float(avg),
+        "median": float(median),
+        "p95": float(p95),
+        "min": float(lo),
+        "max": float(hi),
     }
 
 
@@ -47,11 +50,27 @@ class RunConfig:
     titles: List[str]
     seed: int = 42
     m_bits: int = 40
+    key_hash: str = DEFAULT_KEY_HASH  # Chord title -> key hash, see key_hash.KEY_HASHES
     updates_n: int = 2000
     deletes_n: int = 2000
     joins_n: int = 10
     leaves_n: int = 10
     max_rows: int = 946_460
+    # filled once per dataset by prepare_titles() and shared by Chord and Pastry
+    all_titles: Optional[List[str]] = None
+    unique_titles: Optional[List[str]] = None
+
+
+@dataclass
+class Dataset:
+    """
+    Row tuples pulled out of the DataFrame once and shared (read-only) by the
+    Chord and Pastry runs. Record dicts are built per insert, so updates made
+    by one run never leak into the other.
+    """
+    columns: List[str]
+    rows: List[Tuple[Any, ...]]
+    titles: List[str]  # aligned with rows
 
 
 @dataclass
@@ -69,17 +88,37 @@ class RunResult:
 
 
 # ---------- helpers ----------
-def choose_titles(all_titles: List[str], cfg: RunConfig) -> List[str]:
+def prepare_dataset(df) -> Dataset:
+    """Iterate the DataFrame a single time; every run reuses the result."""
+    cols = record_columns(df)
+    rows = list(df[cols].itertuples(index=False, name=None))
+    title_idx = cols.index("title")
+    return Dataset(columns=cols, rows=rows, titles=[str(r[title_idx]) for r in rows])
+
+
+def _as_dataset(data) -> Dataset:
+    return data if isinstance(data, Dataset) else prepare_dataset(data)
+
+
+def prepare_titles(data: Dataset, cfg: RunConfig) -> None:
+    """Compute the title lists once so back-to-back runs don't redo it."""
+    titles = np.asarray(data.titles, dtype=object)
+    cfg.all_titles = data.titles
+    cfg.unique_titles = pd.unique(titles).tolist()
+
+
+def choose_titles(all_titles: List[str], cfg: RunConfig, rng: Optional[random.Random] = None) -> List[str]:
     """Use user titles first (if exist), else fill randomly until K."""
+    choice = (rng or random).choice
     pool = all_titles
     s = set(pool)
     picked: List[str] = []
     for t in cfg.titles:
         t = t.strip()
         if t:
-            picked.append(t if t in s else random.choice(pool))
+            picked.append(t if t in s else choice(pool))
     while len(picked) < cfg.k_lookups:
-        picked.append(random.choice(pool))
+        picked.append(choice(pool))
     return picked[: cfg.k_lookups]
 
 
@@ -90,10 +129,25 @@ def _mk_logger(log_cb):
     return log
 
 
-def _mk_progress(progress_cb):
-    def prog(stage: str, cur: int, total: int, overall: Optional[float] = None):
-        if progress_cb:
-            progress_cb(stage, cur, total, overall)
+def _mk_progress(progress_cb, min_interval: float = 0.1):
+    """
+    Time-throttled progress: intermediate updates are dropped if the previous
+    one went out less than min_interval seconds ago, so the UI update rate
+    doesn't scale with the workload. First/last steps of a stage always pass.
+    """
+    last = [0.0]
+
+    def prog(stage: str, cur: int, total: int, stage_key: Optional[str] = None):
+        if not progress_cb:
+            return
+        now = time.monotonic()
+        if now - last[0] < min_interval and 0 < cur < total:
+            return
+        last[0] = now
+        overall = None
+        if stage_key is not None:
+            overall = _overall_value(stage_key, cur / total if total else 0.0)
+        progress_cb(stage, cur, total, overall)
     return prog
 
 
@@ -128,9 +182,10 @@ class Adapter:
     name: str
     space: int
     initial_join_label: str
+    rng: random.Random  # the run's only PRNG; adapters and _run draw from it
 
     join_one: Callable[[int], Tuple[int, int]]              # (hops, moved)
-    insert_one: Callable[[Dict[str, Any]], int]             # hops
+    insert_one: Callable[[str, Dict[str, Any]], int]        # hops
     dyn_join_one: Callable[[int], Tuple[int, int]]          # (hops, moved)
     dyn_leave_one: Callable[[], Tuple[bool, int, int]]      # (ok, hops, moved)
     update_one: Callable[[str], int]                        # hops
@@ -138,61 +193,68 @@ class Adapter:
     lookup_one: Callable[[str], Tuple[Optional[float], int]]  # (popularity, hops)
 
 
-def _run(df, cfg: RunConfig, ad: Adapter, log_cb=None, progress_cb=None) -> RunResult:
+def _run(data: Dataset, cfg: RunConfig, ad: Adapter, log_cb=None, progress_cb=None) -> RunResult:
     log = _mk_logger(log_cb)
     prog = _mk_progress(progress_cb)
 
-    random.seed(cfg.seed)
+    rng = ad.rng
+    _randrange = rng.randrange
 
     # node IDs
-    node_ids = random.sample(range(ad.space), k=cfg.num_nodes)
-
-    # metrics
-    initial_join_hops: List[int] = []
-    initial_join_moved: List[int] = []
-    insert_hops: List[int] = []
-    join_hops: List[int] = []
-    join_moved: List[int] = []
-    leave_hops: List[int] = []
-    leave_moved: List[int] = []
-    update_hops: List[int] = []
-    delete_hops: List[int] = []
-    lookup_hops: List[int] = []
+    if ad.space <= sys.maxsize:
+        node_ids = rng.sample(range(ad.space), k=cfg.num_nodes)
+    else:  # m=64: range() has no len() past ssize_t, so draw distinct ids directly
+        node_ids, taken = [], set()
+        while len(node_ids) < cfg.num_nodes:
+            nid = _randrange(ad.space)
+            if nid not in taken:
+                taken.add(nid)
+                node_ids.append(nid)
+
+    # metrics: packed int32 storage (array for append-only, np.empty where the size is known)
+    initial_join_hops = array("i")
+    initial_join_moved = array("i")
+    join_hops = array("i")
+    join_moved = array("i")
+    leave_hops = array("i")
+    leave_moved = array("i")
+    lookup_hops = array("i")
     lookup_rows: List[LookupRow] = []
 
     # 1) initial joins
-    prog(f"{ad.name}: Joining initial nodes", 0, len(node_ids), _overall_value("initial_join", 0))
+    prog(f"{ad.name}: Joining initial nodes", 0, len(node_ids), "initial_join")
     for i, nid in enumerate(node_ids, start=1):
         hops, moved = ad.join_one(nid)
         initial_join_hops.append(int(hops))
         initial_join_moved.append(int(moved))
-        if i == len(node_ids) or i % max(1, len(node_ids)//20) == 0:
-            prog(f"{ad.name}: Joining initial nodes", i, len(node_ids), _overall_value("initial_join", i/len(node_ids)))
+        prog(f"{ad.name}: Joining initial nodes", i, len(node_ids), "initial_join")
     log(f"[{ad.name}] Joined initial nodes")
 
     # 2) inserts
-    total_rows = len(df)
-    prog(f"{ad.name}: Inserting dataset", 0, total_rows, _overall_value("insert", 0))
-    for i, (_, row) in enumerate(df.iterrows(), start=1):
-        insert_hops.append(int(ad.insert_one(row.to_dict())))
-        if i == total_rows or i % 2000 == 0:
-            prog(f"{ad.name}: Inserting dataset", i, total_rows, _overall_value("insert", i/total_rows))
+    total_rows = len(data.rows)
+    insert_hops = np.empty(total_rows, dtype=np.int32)
+    label = f"{ad.name}: Inserting dataset"
+    prog(label, 0, total_rows, "insert")
+    cols = data.columns
+    for i, (title, row) in enumerate(zip(data.titles, data.rows), start=1):
+        insert_hops[i - 1] = ad.insert_one(title, dict(zip(cols, row)))
+        prog(label, i, total_rows, "insert")
     log(f"[{ad.name}] Inserted dataset")
 
     # 3) dynamic joins
-    prog(f"{ad.name}: Dynamic joins", 0, cfg.joins_n, _overall_value("dyn_join", 0))
+    prog(f"{ad.name}: Dynamic joins", 0, cfg.joins_n, "dyn_join")
     for i in range(1, cfg.joins_n + 1):
-        nid = random.randrange(0, ad.space)
+        nid = _randrange(0, ad.space)
         hops, moved = ad.dyn_join_one(nid)
         join_hops.append(int(hops))
         join_moved.append(int(moved))
-        prog(f"{ad.name}: Dynamic joins", i, cfg.joins_n, _overall_value("dyn_join", i/cfg.joins_n))
+        prog(f"{ad.name}: Dynamic joins", i, cfg.joins_n, "dyn_join")
     log(f"[{ad.name}] Dynamic joins done")
 
     # 4) dynamic leaves
     done = 0
     safety = 0
-    prog(f"{ad.name}: Dynamic leaves", 0, cfg.leaves_n, _overall_value("dyn_leave", 0))
+    prog(f"{ad.name}: Dynamic leaves", 0, cfg.leaves_n, "dyn_leave")
     while done < cfg.leaves_n and safety < 4000:
         safety += 1
         ok, hops, moved = ad.dyn_leave_one()
@@ -200,40 +262,48 @@ def _run(df, cfg: RunConfig, ad: Adapter, log_cb=None, progress_cb=None) -> RunR
             leave_hops.append(int(hops))
             leave_moved.append(int(moved))
             done += 1
-            prog(f"{ad.name}: Dynamic leaves", done, cfg.leaves_n, _overall_value("dyn_leave", done/cfg.leaves_n))
+            prog(f"{ad.name}: Dynamic leaves", done, cfg.leaves_n, "dyn_leave")
         # if ok==False we just retry another random candidate
     log(f"[{ad.name}] Dynamic leaves done")
 
     # titles
-    all_titles = df["title"].dropna().astype(str).tolist()
-    unique_titles = list(dict.fromkeys(all_titles))
+    if cfg.unique_titles is None or cfg.all_titles is None:
+        prepare_titles(data, cfg)
+    all_titles = cfg.all_titles
+    unique_titles = cfg.unique_titles
+    # index sampling without replacement in C; own seeded stream, global random untouched
+    sample_rng = np.random.default_rng(cfg.seed)
 
     # 5) updates
     upd_total = min(cfg.updates_n, len(unique_titles))
-    prog(f"{ad.name}: Updates", 0, upd_total, _overall_value("update", 0))
-    for i, t in enumerate(random.sample(unique_titles, k=upd_total), start=1):
-        update_hops.append(int(ad.update_one(t)))
-        if i == upd_total or i % 200 == 0:
-            prog(f"{ad.name}: Updates", i, upd_total, _overall_value("update", i/upd_total))
+    update_hops = np.empty(upd_total, dtype=np.int32)
+    label = f"{ad.name}: Updates"
+    prog(label, 0, upd_total, "update")
+    upd_idx = sample_rng.choice(len(unique_titles), size=upd_total, replace=False)
+    for i, ti in enumerate(upd_idx.tolist(), start=1):
+        update_hops[i - 1] = ad.update_one(unique_titles[ti])
+        prog(label, i, upd_total, "update")
     log(f"[{ad.name}] Updates done")
 
     # 6) deletes
     del_total = min(cfg.deletes_n, len(unique_titles))
-    prog(f"{ad.name}: Deletes", 0, del_total, _overall_value("delete", 0))
-    for i, t in enumerate(random.sample(unique_titles, k=del_total), start=1):
-        delete_hops.append(int(ad.delete_one(t)))
-        if i == del_total or i % 200 == 0:
-            prog(f"{ad.name}: Deletes", i, del_total, _overall_value("delete", i/del_total))
+    delete_hops = np.empty(del_total, dtype=np.int32)
+    label = f"{ad.name}: Deletes"
+    prog(label, 0, del_total, "delete")
+    del_idx = sample_rng.choice(len(unique_titles), size=del_total, replace=False)
+    for i, ti in enumerate(del_idx.tolist(), start=1):
+        delete_hops[i - 1] = ad.delete_one(unique_titles[ti])
+        prog(label, i, del_total, "delete")
     log(f"[{ad.name}] Deletes done")
 
     # 7) lookups (K)
-    titles = choose_titles(all_titles, cfg)
-    prog(f"{ad.name}: Lookups", 0, len(titles), _overall_value("lookup", 0))
+    titles = choose_titles(all_titles, cfg, rng)
+    prog(f"{ad.name}: Lookups", 0, len(titles), "lookup")
     for i, t in enumerate(titles, start=1):
         pop, hops = ad.lookup_one(t)
         lookup_hops.append(int(hops))
         lookup_rows.append(LookupRow(title=t, popularity=pop, hops=int(hops)))
-        prog(f"{ad.name}: Lookups", i, len(titles), _overall_value("lookup", i/len(titles)))
+        prog(f"{ad.name}: Lookups", i, len(titles), "lookup")
     log(f"[{ad.name}] Lookups done")
 
     summary_rows = [
@@ -253,59 +323,57 @@ def _run(df, cfg: RunConfig, ad: Adapter, log_cb=None, progress_cb=None) -> RunR
 
 
 # ---------- adapters ----------
-def run_chord(df, cfg: RunConfig, log_cb=None, progress_cb=None) -> RunResult:
-    ring = ChordRing(m=cfg.m_bits)
+def run_chord(data, cfg: RunConfig, log_cb=None, progress_cb=None) -> RunResult:
+    data = _as_dataset(data)
+    ring = ChordRing(m=cfg.m_bits, key_hash=cfg.key_hash)
+    _mk_logger(log_cb)(f"[Chord] Keys: {ring.key_hash}, m={ring.m}")
     space = 2 ** ring.m
+    rng = random.Random(cfg.seed)
+    _choice, _randrange = rng.choice, rng.randrange
+
+    # hash every distinct title once; every operation reuses the cached keys
+    unique = list(set(data.titles))
+    key_of = dict(zip(unique, hash_titles(unique, m=ring.m, key_hash=ring.key_hash).tolist()))
+
+    existing = set()  # node ids handed to join_node so far
 
-    # join signatures vary a bit; normalize to (hops, moved)
     def join_one(nid: int) -> Tuple[int, int]:
-        ret = ring.join_node(nid)
-        if isinstance(ret, tuple) and len(ret) >= 3:
-            return int(ret[1]), int(ret[2] or 0)
-        if isinstance(ret, tuple) and len(ret) == 2:
-            return int(ret[1]), 0
-        return int(ret), 0
-
-    def insert_one(rec: Dict[str, Any]) -> int:
-        key = chord_hash(str(rec["title"]), m=ring.m)
-        ret = ring.insert(key, rec)
-        return int(ret[1] if isinstance(ret, tuple) else ret)
+        existing.add(nid)
+        _, hops, moved = ring.join_node(nid)
+        return hops, moved
+
+    def insert_one(title: str, rec: Dict[str, Any]) -> int:
+        return ring.insert(key_of[title], rec)
 
     def dyn_join_one(nid: int) -> Tuple[int, int]:
+        while nid in existing:
+            nid = _randrange(0, space)
         return join_one(nid)
 
     def dyn_leave_one() -> Tuple[bool, int, int]:
-        if len(getattr(ring, "nodes", [])) <= 2:
+        if len(ring.nodes) <= 2:
             return False, 0, 0
-        leave_node = random.choice(ring.nodes[1:])
-        leave_id = getattr(leave_node, "node_id", getattr(leave_node, "id", None))
+        leave_node = _choice(ring.nodes[1:])
 
-        if "start_node" in ring.leave_node.__code__.co_varnames:
-            start = random.choice([n for n in ring.nodes if n is not leave_node])
-            ret = ring.leave_node(leave_id, start_node=start)
-        else:
-            ret = ring.leave_node(leave_id)
-
-        if isinstance(ret, tuple) and len(ret) >= 3:
-            return bool(ret[0]), int(ret[1]), int(ret[2] or 0)
-        if isinstance(ret, tuple) and len(ret) == 2:
-            return True, int(ret[1]), 0
-        return True, int(ret), 0
+        # rejection sampling: uniform over the other nodes without building a list
+        start = _choice(ring.nodes)
+        while start is leave_node:
+            start = _choice(ring.nodes)
+        return ring.leave_node(leave_node.node_id, start_node=start)
 
     def update_one(title: str) -> int:
-        ret = ring.update_movie_field(title, "popularity", 9.5)
-        return int(ret[1] if isinstance(ret, tuple) and len(ret) > 1 else (ret if not isinstance(ret, tuple) else 0))
+        _, hops = ring.update_key_field(key_of[title], "popularity", 9.5)
+        return hops
 
     def delete_one(title: str) -> int:
-        if hasattr(ring, "delete_title"):
-            ret = ring.delete_title(title)
-            return int(ret[1] if isinstance(ret, tuple) else ret)
-        key = chord_hash(title, m=ring.m)
-        ret = ring.delete(key)
-        return int(ret[1] if isinstance(ret, tuple) else ret)
+        return ring.delete_key(key_of[title])
 
     def lookup_one(title: str) -> Tuple[Optional[float], int]:
-        records, hops = ring.lookup(title)
+        # user-typed titles may not be in the dataset
+        key_int = key_of.get(title)
+        if key_int is None:
+            key_int = chord_hash(title, ring.m, ring.key_hash)
+        records, hops = ring.lookup_key(key_int)
         pop = None
         if records:
             rec = records[0] if isinstance(records, list) else records
@@ -317,6 +385,7 @@ def run_chord(df, cfg: RunConfig, log_cb=None, progress_cb=None) -> RunResult:
         name="Chord",
         space=space,
         initial_join_label="Initial join hops",
+        rng=rng,
         join_one=join_one,
         insert_one=insert_one,
         dyn_join_one=dyn_join_one,
@@ -325,39 +394,47 @@ def run_chord(df, cfg: RunConfig, log_cb=None, progress_cb=None) -> RunResult:
         delete_one=delete_one,
         lookup_one=lookup_one,
     )
-    return _run(df, cfg, ad, log_cb=log_cb, progress_cb=progress_cb)
+    return _run(data, cfg, ad, log_cb=log_cb, progress_cb=progress_cb)
 
 
-def run_pastry(df, cfg: RunConfig, log_cb=None, progress_cb=None) -> RunResult:
+def run_pastry(data, cfg: RunConfig, log_cb=None, progress_cb=None) -> RunResult:
+    data = _as_dataset(data)
     ring = PastryRing(m=cfg.m_bits, leaf_size=8, btree_size=32)
     space = 2 ** ring.m
+    rng = random.Random(cfg.seed)
+    _choice, _randrange = rng.choice, rng.randrange
+
+    existing = set()  # node ids handed to join_node so far
 
     def join_one(nid: int) -> Tuple[int, int]:
+        existing.add(nid)
         _, hops, _, moved = ring.join_node(nid)
         return int(hops), int(moved)
 
-    def insert_one(rec: Dict[str, Any]) -> int:
-        return int(ring.insert_title(str(rec["title"]), rec, start_node=random.choice(ring.nodes)))
+    def insert_one(title: str, rec: Dict[str, Any]) -> int:
+        return int(ring.insert_title(title, rec, start_node=_choice(ring.nodes)))
 
     def dyn_join_one(nid: int) -> Tuple[int, int]:
+        while nid in existing:
+            nid = _randrange(0, space)
         return join_one(nid)
 
     def dyn_leave_one() -> Tuple[bool, int, int]:
         if len(ring.nodes) <= 2:
             return False, 0, 0
-        leave_node = random.choice(ring.nodes[1:])
+        leave_node = _choice(ring.nodes[1:])
         ok, hops, moved = ring.leave_node(leave_node.id)
         return bool(ok), int(hops), int(moved)
 
     def update_one(title: str) -> int:
-        _, hops = ring.update_movie_field(title, "popularity", 9.5, start_node=random.choice(ring.nodes))
+        _, hops = ring.update_movie_field(title, "popularity", 9.5, start_node=_choice(ring.nodes))
         return int(hops)
 
     def delete_one(title: str) -> int:
-        return int(ring.delete_title(title, start_node=random.choice(ring.nodes)))
+        return int(ring.delete_title(title, start_node=_choice(ring.nodes)))
 
     def lookup_one(title: str) -> Tuple[Optional[float], int]:
-        records, hops = ring.lookup(title, start_node=random.choice(ring.nodes))
+        records, hops = ring.lookup(title, start_node=_choice(ring.nodes))
         pop = None
         if records:
             rec = records[0] if isinstance(records, list) else records
@@ -369,6 +446,7 @@ def run_pastry(df, cfg: RunConfig, log_cb=None, progress_cb=None) -> RunResult:
         name="Pastry",
         space=space,
         initial_join_label="Initial join (locate) hops",
+        rng=rng,
         join_one=join_one,
         insert_one=insert_one,
         dyn_join_one=dyn_join_one,
@@ -377,4 +455,4 @@ def run_pastry(df, cfg: RunConfig, log_cb=None, progress_cb=None) -> RunResult:
         delete_one=delete_one,
         lookup_one=lookup_one,
     )
-    return _run(df, cfg, ad, log_cb=log_cb, progress_cb=progress_cb)
+    return _run(data, cfg, ad, log_cb=log_cb, progress_cb=progress_cb)
@@ -17,7 +17,7 @@ from tkinter import ttk, messagebox
 
 from data_read import load_and_preprocess_csv
 
-from experiments import RunConfig, RunResult, run_chord, run_pastry
+from experiments import RunConfig, RunResult, prepare_dataset, prepare_titles, run_chord, run_pastry
 from ui_helpers import build_result_tab, clear_tree, render_result
 
 
@@ -32,7 +32,9 @@ class App(tk.Tk):
         self.views: Dict[str, Dict[str, ttk.Treeview]] = {}
 
         self._build_ui()
-        self.after(100, self._poll_queue)
+        # the worker posts to the queue and wakes the UI with a virtual event,
+        # so there's no idle polling
+        self.bind("<<WorkerMessage>>", self._drain_queue)
 
     def _build_ui(self):
         top = ttk.Frame(self, padding=10)
@@ -148,36 +150,46 @@ class App(tk.Tk):
         self._worker = threading.Thread(target=self._run_worker, args=(csv_path, cfg), daemon=True)
         self._worker.start()
 
+    def _post(self, kind: str, payload: Any):
+        """Called from the worker thread: queue a message and wake the Tk loop."""
+        self._queue.put((kind, payload))
+        try:
+            self.event_generate("<<WorkerMessage>>", when="tail")
+        except (tk.TclError, RuntimeError):
+            pass  # window already closed
+
     def _run_worker(self, csv_path: Path, cfg: RunConfig):
         def log(msg: str):
-            self._queue.put(("log", msg))
+            self._post("log", msg)
 
         def progress(stage: str, cur: int, total: int, overall_pct: Optional[float] = None):
-            self._queue.put(("progress", (stage, cur, total, overall_pct)))
+            self._post("progress", (stage, cur, total, overall_pct))
 
         try:
             progress("Loading dataset", 0, 1, 0)
             df = load_and_preprocess_csv(str(csv_path), max_rows=cfg.max_rows, seed=1)
             log(f"[OK] Loaded {len(df)} rows from {csv_path}")
+            data = prepare_dataset(df)
+            prepare_titles(data, cfg)
             progress("Loading dataset", 1, 1, 5)
 
-            self._queue.put(("status", "Running Chord..."))
-            chord_res = run_chord(df, cfg, log_cb=log, progress_cb=progress)
-            self._queue.put(("result", chord_res))
+            self._post("status", "Running Chord...")
+            chord_res = run_chord(data, cfg, log_cb=log, progress_cb=progress)
+            self._post("result", chord_res)
 
-            self._queue.put(("status", "Running Pastry..."))
-            pastry_res = run_pastry(df, cfg, log_cb=log, progress_cb=progress)
-            self._queue.put(("result", pastry_res))
+            self._post("status", "Running Pastry...")
+            pastry_res = run_pastry(data, cfg, log_cb=log, progress_cb=progress)
+            self._post("result", pastry_res)
 
-            self._queue.put(("status", "Done."))
-            self._queue.put(("progress", ("Done", 1, 1, 100)))
-            self._queue.put(("done", None))
+            self._post("status", "Done.")
+            self._post("progress", ("Done", 1, 1, 100))
+            self._post("done", None)
 
         except Exception as e:
-            self._queue.put(("error", str(e)))
-            self._queue.put(("done", None))
+            self._post("error", str(e))
+            self._post("done", None)
 
-    def _poll_queue(self):
+    def _drain_queue(self, _event=None):
         try:
             while True:
                 kind, payload = self._queue.get_nowait()
@@ -212,8 +224,6 @@ class App(tk.Tk):
         except queue.Empty:
             pass
 
-        self.after(100, self._poll_queue)
-
 
 if __name__ == "__main__":
     App().mainloop()
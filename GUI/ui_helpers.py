@@ -5,7 +5,7 @@ Small UI helper utilities to keep gui_dht.py short.
 
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Tuple
 
 import tkinter as tk
 from tkinter import ttk
@@ -15,6 +15,9 @@ from experiments import RunResult
 
 SUMMARY_COLS = ("metric", "n", "avg", "median", "p95", "min", "max")
 LOOKUP_COLS = ("title", "popularity", "hops")
+# Treeview inserts are one Tcl call per row; beyond this many rows the
+# table stops being readable anyway, so the rest is summarised in one row
+MAX_TREE_ROWS = 1000
 
 
 def make_tree(parent: ttk.Frame, cols: Tuple[str, ...], widths: Dict[str, int], height: int) -> ttk.Treeview:
@@ -26,8 +29,10 @@ def make_tree(parent: ttk.Frame, cols: Tuple[str, ...], widths: Dict[str, int],
 
 
 def clear_tree(tree: ttk.Treeview) -> None:
-    for item in tree.get_children():
-        tree.delete(item)
+    # one Tcl delete for all items instead of one call per row
+    items = tree.get_children()
+    if items:
+        tree.delete(*items)
 
 
 def fmt(x: Any) -> str:
@@ -70,25 +75,36 @@ def build_result_tab(parent: ttk.Frame) -> Dict[str, ttk.Treeview]:
     return {"summary": summary, "lookup": lookup}
 
 
+def fill_tree(tree: ttk.Treeview, rows: List[Tuple[Any, ...]], omitted: int = 0) -> None:
+    """
+    Insert rows that were formatted up front (callers cap them at MAX_TREE_ROWS),
+    plus one note row when `omitted` rows were left out.
+    """
+    insert = tree.insert
+    for values in rows:
+        insert("", tk.END, values=values)
+    if omitted:
+        insert("", tk.END, values=(f"… {omitted} more rows not shown",))
+
+
 def render_result(views: Dict[str, ttk.Treeview], res: RunResult) -> None:
-    summary = views["summary"]
-    lookup = views["lookup"]
-
-    for metric, st in res.summary_rows:
-        summary.insert(
-            "",
-            tk.END,
-            values=(
-                metric,
-                fmt(st.get("n")),
-                fmt(st.get("avg")),
-                fmt(st.get("median")),
-                fmt(st.get("p95")),
-                fmt(st.get("min")),
-                fmt(st.get("max")),
-            ),
+    summary_rows = [
+        (
+            metric,
+            fmt(st.get("n")),
+            fmt(st.get("avg")),
+            fmt(st.get("median")),
+            fmt(st.get("p95")),
+            fmt(st.get("min")),
+            fmt(st.get("max")),
         )
-
-    for row in res.lookup_rows:
-        pop = "" if row.popularity is None else str(row.popularity)
-        lookup.insert("", tk.END, values=(row.title, pop, row.hops))
+        for metric, st in res.summary_rows
+    ]
+    shown = res.lookup_rows[:MAX_TREE_ROWS]
+    lookup_rows = [
+        (row.title, "" if row.popularity is None else str(row.popularity), row.hops)
+        for row in shown
+    ]
+
+    fill_tree(views["summary"], summary_rows)
+    fill_tree(views["lookup"], lookup_rows, omitted=len(res.lookup_rows) - len(shown))
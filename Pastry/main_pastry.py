@@ -1,49 +1,48 @@
 from pathlib import Path
-import random
-import statistics
+
+import numpy as np
 
 from plot_pastry import plot_main_pastry_results, records_per_node_pastry
 
-from data_read import load_and_preprocess_csv
+from data_read import load_and_preprocess_csv, record_columns
+from hop_stats import summary
 from pastry import PastryRing
 
 
 # ---------------- helpers ---------------------
-def _p95(values):
-    if not values:
-        return None
-    s = sorted(values)
-    idx = int(round(0.95 * (len(s) - 1)))
-    return s[idx]
-
-
 def _stats_line(name, values):
-    if not values:
+    st = summary(values)
+    if st is None:
         print(f"{name}: (no values)")
         return
+    n, avg, median, p95, lo, hi = st
     print(
-        f"{name}: n={len(values)}  avg={statistics.mean(values):.2f}  "
-        f"median={statistics.median(values):.2f}  p95={_p95(values)}  "
-        f"min={min(values)}  max={max(values)}"
+        f"{name}: n={n}  avg={avg:.2f}  "
+        f"median={median:.2f}  p95={p95}  "
+        f"min={lo}  max={hi}"
     )
 
 
 def print_nodes_summary(ring: PastryRing):
     print(f"Nodes: {len(ring.nodes)}")
     for n in ring.nodes:
-        records = len(n.btree.get_all_items())
+        records = len(n.btree)
         leaf = len(n.leaf_set)
-        routing = sum(1 for row in n.route_table for v in row.values() if v is not None)
+        routing = sum(v is not None for row in n.route_table for v in row.values())
         print(f"  node={n.id}  leaf={leaf}  routing={routing}  records={records}")
 
 
 # ---------------- main -----------------
 def main():
+    seed = 1
+    # the one RNG for every sampling step below, seeded like the dataset sample
+    rng = np.random.default_rng(seed)
+
     project_root = Path(".").resolve()
     data_path = project_root / "data_movies_clean.csv"
 
     print(f"Loading dataset from: {data_path}")
-    df = load_and_preprocess_csv(str(data_path), max_rows=946_460, seed=1)
+    df = load_and_preprocess_csv(str(data_path), max_rows=946_460, seed=seed)
     print(f"Loaded {len(df)} rows.\n")
 
     # params 
@@ -73,8 +72,8 @@ def main():
     moved_list = []
     for nid in node_ids:
         _, locate_hops, _, moved = ring.join_node(nid)
-        join_hops_list.append(int(locate_hops))
-        moved_list.append(int(moved))
+        join_hops_list.append(locate_hops)
+        moved_list.append(moved)
 
     print_nodes_summary(ring)
     _stats_line("Initial join (locate) hops", join_hops_list)
@@ -82,11 +81,15 @@ def main():
 
     # -------- Insert all movies --------
     print("\n=== Inserting movies into Pastry ===")
-    insert_hops = []
-    for _, row in df.iterrows():
-        title = str(row["title"])
-        hops = ring.insert_title(title, row.to_dict(), start_node=random.choice(ring.nodes))
-        insert_hops.append(int(hops))
+    # one C-level conversion instead of a Series per row (iterrows)
+    records = df[record_columns(df)].to_dict(orient="records")
+    insert_hops = np.empty(len(records), dtype=np.int32)
+    # start nodes drawn in one batch; membership doesn't change in this phase
+    nodes = tuple(ring.nodes)
+    start_idx = rng.integers(0, len(nodes), size=len(records)).tolist()
+    for i, (rec, si) in enumerate(zip(records, start_idx)):
+        hops = ring.insert_title(rec["title"], rec, start_node=nodes[si])
+        insert_hops[i] = hops
 
     print_nodes_summary(ring)
     _stats_line("Insert hops", insert_hops)
@@ -99,17 +102,18 @@ def main():
     join_moved_list = []
     join_total_hops_list = []
 
+    # joins_n ids in one draw; collisions in a 2**m space are rare, so only
+    # those get redrawn
     existing = set(n.id for n in ring.nodes)
-    for _ in range(joins_n):
-        nid = random.randrange(0, space)
+    for nid in rng.integers(0, space, size=joins_n).tolist():
         while nid in existing:
-            nid = random.randrange(0, space)
+            nid = int(rng.integers(0, space))
         existing.add(nid)
 
         _, locate_hops, _, moved = ring.join_node(nid)
 
-        join_total_hops_list.append(int(locate_hops))  
-        join_moved_list.append(int(moved))
+        join_total_hops_list.append(locate_hops)  
+        join_moved_list.append(moved)
 
     _stats_line("Join total hops", join_total_hops_list)
     _stats_line("Join moved records", join_moved_list)
@@ -124,14 +128,17 @@ def main():
     leave_total_hops_list = []
 
     leaves_done = 0
-    safety = 0
-    while leaves_done < leaves_n and len(ring.nodes) > 2 and safety < 1000:
-        safety += 1
-        leave_node = random.choice(ring.nodes[1:])
+    # leave_node only fails for unknown ids and nodes[0] (lowest id, the
+    # bootstrap) is never picked, so distinct victims can be drawn up front;
+    # at least two nodes stay in the ring
+    nodes_tail = ring.nodes[1:]
+    n_victims = min(leaves_n, max(len(ring.nodes) - 2, 0))
+    victims = [nodes_tail[i] for i in rng.choice(len(nodes_tail), size=n_victims, replace=False)]
+    for leave_node in victims:
         ok, routing_hops, moved = ring.leave_node(leave_node.id)
         if ok:
-            leave_total_hops_list.append(int(routing_hops))  
-            leave_moved_list.append(int(moved))
+            leave_total_hops_list.append(routing_hops)  
+            leave_moved_list.append(moved)
             leaves_done += 1
 
     print(f"Leaves done={leaves_done}/{leaves_n}")
@@ -144,15 +151,19 @@ def main():
 
     # -------- UPDATE --------
     print("\n=== UPDATE (Pastry) ===")
-    all_titles = df["title"].dropna().astype(str).tolist()
-    unique_titles = list(dict.fromkeys(all_titles))
+    # load_and_preprocess_csv already stores titles as str, no re-coercion
+    titles = df["title"].dropna()
+    # hash-based dedup in C, first-occurrence order kept, as an object array
+    unique_titles = titles.drop_duplicates().to_numpy()
 
-    update_hops = []
     update_ok = 0
-    for t in random.sample(unique_titles, k=min(updates_n, len(unique_titles))):
-        start_node = random.choice(ring.nodes)
-        updated, hops = ring.update_movie_field(t, "popularity", 9.5, start_node=start_node)
-        update_hops.append(int(hops))
+    update_titles = rng.choice(unique_titles, size=min(updates_n, len(unique_titles)), replace=False)
+    update_hops = np.empty(len(update_titles), dtype=np.int32)
+    nodes = tuple(ring.nodes)
+    start_idx = rng.integers(0, len(nodes), size=len(update_titles)).tolist()
+    for i, (t, si) in enumerate(zip(update_titles, start_idx)):
+        updated, hops = ring.update_movie_field(t, "popularity", 9.5, start_node=nodes[si])
+        update_hops[i] = hops
         if updated:
             update_ok += 1
 
@@ -161,35 +172,38 @@ def main():
 
     # -------- DELETE --------
     print("\n=== DELETE (Pastry) ===")
-    delete_hops = []
-    for t in random.sample(unique_titles, k=min(deletes_n, len(unique_titles))):
-        start_node = random.choice(ring.nodes)
-        hops = ring.delete_title(t, start_node=start_node)
-        delete_hops.append(int(hops))
+    delete_titles = rng.choice(unique_titles, size=min(deletes_n, len(unique_titles)), replace=False)
+    delete_hops = np.empty(len(delete_titles), dtype=np.int32)
+    start_idx = rng.integers(0, len(nodes), size=len(delete_titles)).tolist()
+    for i, (t, si) in enumerate(zip(delete_titles, start_idx)):
+        hops = ring.delete_title(t, start_node=nodes[si])
+        delete_hops[i] = hops
 
     print(f"Deletes attempted={len(delete_hops)}")
     _stats_line("Delete hops", delete_hops)
 
     # -------- LOOKUP --------
     print("\n=== LOOKUP (Pastry) ===")
-    titles_set = set(all_titles)
+    # K is a handful of inputs: one vectorized scan per title instead of
+    # hashing every title into a set for K membership tests
     titles_to_lookup = []
     for i in range(K):
         user_title = input(f'Dwse titlo #{i+1} (Enter gia tyxaio): ').strip()
         if not user_title:
-            titles_to_lookup.append(random.choice(all_titles))
-        elif user_title in titles_set:
+            titles_to_lookup.append(titles.iat[rng.integers(len(titles))])
+        elif (titles == user_title).any():
             titles_to_lookup.append(user_title)
         else:
             print(f'  (Den vrethhke akribws o titlos "{user_title}", epilegw tyxaia apo to dataset)')
-            titles_to_lookup.append(random.choice(all_titles))
+            titles_to_lookup.append(titles.iat[rng.integers(len(titles))])
 
     print("\n=== Popularities of K movies (Pastry) ===")
-    lookup_hops = []
+    lookup_hops = np.empty(len(titles_to_lookup), dtype=np.int32)
 
-    for title in titles_to_lookup:
-        records, hops = ring.lookup(title, start_node=random.choice(ring.nodes))
-        lookup_hops.append(int(hops))
+    start_idx = rng.integers(0, len(nodes), size=len(titles_to_lookup)).tolist()
+    for i, (title, si) in enumerate(zip(titles_to_lookup, start_idx)):
+        records, hops = ring.lookup(title, start_node=nodes[si])
+        lookup_hops[i] = hops
 
         rec = None
         if records:
@@ -123,7 +123,7 @@ class PastryRing:
     def join_node(self, node_id: int):
         """
         Returns:
-        (new_node, locate_hops, avg_move_hops, moved_count)
+        (new_node, locate_hops: int, avg_move_hops: float, moved_count: int)
         """
         locate_hops = 0
         if self.nodes:
@@ -311,5 +311,4 @@ class PastryRing:
 
     def print_nodes_summary(self):
         for n in self.nodes:
-            items = n.btree.get_all_items()
-            print(f"{n} keys = {len(items)}")
+            print(f"{n} keys = {len(n.btree)}")
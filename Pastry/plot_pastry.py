@@ -1,58 +1,52 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
 from pathlib import Path
-import matplotlib.pyplot as plt
+
+from matplotlib.figure import Figure
+import numpy as np
+
+# tight_layout already fits each figure, so skip the bbox_inches="tight"
+# measuring pass and use fast PNG compression
+_SAVE_KW = {"dpi": 100, "pil_kwargs": {"compress_level": 1}}
 
 
 def records_per_node_pastry(ring):
-    return [(n.id, len(n.btree.get_all_items())) for n in ring.nodes]
+    return [(n.id, len(n.btree)) for n in ring.nodes]
 
 
-def plot_main_pastry_results(
-    out_dir: Path,
-    N0: int,
-    insert_hops,
-    update_hops,
-    delete_hops,
-    lookup_hops,
-    load_after_inserts,
-    load_after_join,
-    load_after_leave,
-    join_moved_list,
-    join_total_hops_list,
-    leave_moved_list,
-    leave_total_hops_list,
-):
-    out_dir.mkdir(parents=True, exist_ok=True)
+# ---------------- plot workers -------------------
+# Module-level so a pool worker can run them. They draw on bare Figure
+# objects (Agg canvas, no pyplot state), which is safe in a forked child.
 
-    # hops distributions
-    def _hist(vals, title, fname):
-        if not vals:
-            return
-        fig = plt.figure(figsize=(8.2, 5.0))
-        ax = fig.add_subplot(111)
-        lo = int(min(vals))
-        hi = int(max(vals))
-        ax.hist(vals, bins=range(lo, hi + 2))
+def _plot_hists(out_dir, jobs):
+    # hops distributions; one figure, cleared and redrawn for each file
+    fig = Figure(figsize=(8.2, 5.0))
+    ax = fig.add_subplot(111)
+    for vals, title, fname in jobs:
+        ax.clear()
+        arr = np.asarray(vals)
+        lo = int(arr.min())
+        hi = int(arr.max())
+        # bin once in numpy (unit-wide integer bins) and draw the counts as bars
+        counts, edges = np.histogram(arr, bins=np.arange(lo, hi + 2))
+        ax.bar(edges[:-1], counts, width=1.0, align="edge", rasterized=True)
         ax.set_title(title)
         ax.set_xlabel("Hops")
         ax.set_ylabel("Count")
         ax.grid(True, axis="y", alpha=0.25)
         fig.tight_layout()
-        fig.savefig(out_dir / fname, bbox_inches="tight")
-        plt.close(fig)
-
-    _hist(insert_hops, f"Pastry INSERT hops distribution (N={N0})", "insert_hops_hist.png")
-    _hist(lookup_hops, f"Pastry LOOKUP hops distribution (N={N0})", "lookup_hops_hist.png")
-    _hist(update_hops, f"Pastry UPDATE hops distribution (N={N0})", "update_hops_hist.png")
-    _hist(delete_hops, f"Pastry DELETE hops distribution (N={N0})", "delete_hops_hist.png")
-
-    # load balancing - records per node
-    def _load_bar(load, title, fname):
-        if not load:
-            return
+        fig.savefig(out_dir / fname, **_SAVE_KW)
+
+
+def _plot_load_bars(out_dir, jobs):
+    # load balancing - records per node; one figure, redrawn for each file
+    fig = Figure(figsize=(10.5, 5.2))
+    ax = fig.add_subplot(111)
+    for load, title, fname in jobs:
         counts = [x[1] for x in load]
-        fig = plt.figure(figsize=(10.5, 5.2))
-        ax = fig.add_subplot(111)
-        ax.bar(range(len(counts)), counts)
+        ax.clear()
+        ax.bar(range(len(counts)), counts, rasterized=True)
         ax.set_title(title)
         ax.set_xlabel("Node index (sorted by node id)")
         ax.set_ylabel("Records stored")
@@ -60,64 +54,38 @@ def plot_main_pastry_results(
         ax.set_xticks(range(len(counts)))
         ax.set_xticklabels([f"{i}" for i in range(len(counts))], rotation=0)
         fig.tight_layout()
-        fig.savefig(out_dir / fname, bbox_inches="tight")
-        plt.close(fig)
+        fig.savefig(out_dir / fname, **_SAVE_KW)
 
-    _load_bar(load_after_inserts, f"Load after INSERTS (records per node) (N={N0})", "load_after_inserts.png")
-    _load_bar(load_after_join, f"Load after 10 JOINS (records per node)", "load_after_joins.png")
-    _load_bar(load_after_leave, f"Load after 10 LEAVES (records per node)", "load_after_leaves.png")
 
-    # join/leave overhead — moved records distributions
-    if join_moved_list and leave_moved_list:
-        fig = plt.figure(figsize=(9.2, 5.0))
+def _plot_boxes(out_dir, jobs):
+    # join/leave overhead distributions
+    for data, tick_labels, title, ylabel, fname in jobs:
+        fig = Figure(figsize=(9.2, 5.0))
         ax = fig.add_subplot(111)
-        ax.boxplot([join_moved_list, leave_moved_list], labels=["JOIN moved", "LEAVE moved"], showfliers=False)
-        ax.set_title("Join/Leave data movement (moved records) — distribution")
-        ax.set_ylabel("Moved records")
+        ax.boxplot(data, tick_labels=tick_labels, showfliers=False)
+        ax.set_title(title)
+        ax.set_ylabel(ylabel)
         ax.grid(True, axis="y", alpha=0.25)
         fig.tight_layout()
-        fig.savefig(out_dir / "join_leave_moved_records_box.png", bbox_inches="tight")
-        plt.close(fig)
+        fig.savefig(out_dir / fname, **_SAVE_KW)
 
-    # join/leave overhead — routing hops distributions
-    if join_total_hops_list and leave_total_hops_list:
-        fig = plt.figure(figsize=(9.2, 5.0))
-        ax = fig.add_subplot(111)
-        ax.boxplot(
-            [join_total_hops_list, leave_total_hops_list],
-            labels=["JOIN routing hops", "LEAVE routing hops"],
-            showfliers=False,
-        )
-        ax.set_title("Join/Leave routing overhead (routing hops only) — distribution")
-        ax.set_ylabel("Routing hops")
-        ax.grid(True, axis="y", alpha=0.25)
-        fig.tight_layout()
-        fig.savefig(out_dir / "join_leave_routing_hops_box.png", bbox_inches="tight")
-        plt.close(fig)
 
+def _plot_heatmaps(out_dir, N0, ops):
     # heatmap counts hop-count distribution per operation
-    ops = {
-        "insert": insert_hops,
-        "lookup": lookup_hops,
-        "update": update_hops,
-        "delete": delete_hops,
-    }
-
-    all_vals = [v for lst in ops.values() for v in lst]
-    if all_vals:
-        hop_min = int(min(all_vals))
-        hop_max = int(max(all_vals))
+    nonempty = [np.asarray(v) for v in ops.values() if len(v)]
+    if nonempty:
+        hop_min = int(min(a.min() for a in nonempty))
+        hop_max = int(max(a.max() for a in nonempty))
         hop_values = list(range(hop_min, hop_max + 1))
         op_names = list(ops.keys())
 
-        M = []
-        for op in op_names:
-            counts = {h: 0 for h in hop_values}
-            for h in ops[op]:
-                counts[int(h)] = counts.get(int(h), 0) + 1
-            M.append([counts[h] for h in hop_values])
+        # one C-level count per operation, written into a preallocated matrix;
+        # offsetting by hop_min keeps the bincount as wide as the hop range
+        M = np.zeros((len(op_names), len(hop_values)), dtype=np.int64)
+        for i, op in enumerate(op_names):
+            M[i] = np.bincount(np.asarray(ops[op], dtype=np.int64) - hop_min, minlength=M.shape[1])
 
-        fig = plt.figure(figsize=(9.6, 4.8))
+        fig = Figure(figsize=(9.6, 4.8))
         ax = fig.add_subplot(111)
         im = ax.imshow(M, aspect="auto")
         ax.set_title(f"Heatmap: hop-count distribution per operation (N={N0})")
@@ -130,17 +98,16 @@ def plot_main_pastry_results(
         cbar = fig.colorbar(im, ax=ax)
         cbar.set_label("Count")
         fig.tight_layout()
-        fig.savefig(out_dir / "hops_heatmap_counts.png", bbox_inches="tight")
-        plt.close(fig)
+        fig.savefig(out_dir / "hops_heatmap_counts.png", **_SAVE_KW)
 
     # heatmap (AVG) - average hops per operation 
     op_names = ["insert", "lookup", "update", "delete"]
     avg_ops = []
     for op in op_names:
         vals = ops.get(op, [])
-        avg_ops.append((sum(vals) / len(vals)) if vals else 0.0)
+        avg_ops.append(float(np.mean(vals)) if len(vals) else 0.0)
 
-    fig = plt.figure(figsize=(4.8, 4.0))
+    fig = Figure(figsize=(4.8, 4.0))
     ax = fig.add_subplot(111)
     im = ax.imshow([[x] for x in avg_ops], aspect="auto")
     ax.set_title(f"Heatmap: average hops per operation (N={N0})")
@@ -153,5 +120,84 @@ def plot_main_pastry_results(
     cbar = fig.colorbar(im, ax=ax)
     cbar.set_label("Avg hops")
     fig.tight_layout()
-    fig.savefig(out_dir / "hops_heatmap_avg.png", bbox_inches="tight")
-    plt.close(fig)
+    fig.savefig(out_dir / "hops_heatmap_avg.png", **_SAVE_KW)
+
+
+def plot_main_pastry_results(
+    out_dir: Path,
+    N0: int,
+    insert_hops,
+    update_hops,
+    delete_hops,
+    lookup_hops,
+    load_after_inserts,
+    load_after_join,
+    load_after_leave,
+    join_moved_list,
+    join_total_hops_list,
+    leave_moved_list,
+    leave_total_hops_list,
+):
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    hist_jobs = [
+        (vals, title, fname)
+        for vals, title, fname in (
+            (insert_hops, f"Pastry INSERT hops distribution (N={N0})", "insert_hops_hist.png"),
+            (lookup_hops, f"Pastry LOOKUP hops distribution (N={N0})", "lookup_hops_hist.png"),
+            (update_hops, f"Pastry UPDATE hops distribution (N={N0})", "update_hops_hist.png"),
+            (delete_hops, f"Pastry DELETE hops distribution (N={N0})", "delete_hops_hist.png"),
+        )
+        if len(vals)
+    ]
+    bar_jobs = [
+        (load, title, fname)
+        for load, title, fname in (
+            (load_after_inserts, f"Load after INSERTS (records per node) (N={N0})", "load_after_inserts.png"),
+            (load_after_join, f"Load after 10 JOINS (records per node)", "load_after_joins.png"),
+            (load_after_leave, f"Load after 10 LEAVES (records per node)", "load_after_leaves.png"),
+        )
+        if load
+    ]
+    box_jobs = []
+    if join_moved_list and leave_moved_list:
+        box_jobs.append((
+            [join_moved_list, leave_moved_list], ["JOIN moved", "LEAVE moved"],
+            "Join/Leave data movement (moved records) — distribution", "Moved records",
+            "join_leave_moved_records_box.png",
+        ))
+    if join_total_hops_list and leave_total_hops_list:
+        box_jobs.append((
+            [join_total_hops_list, leave_total_hops_list], ["JOIN routing hops", "LEAVE routing hops"],
+            "Join/Leave routing overhead (routing hops only) — distribution", "Routing hops",
+            "join_leave_routing_hops_box.png",
+        ))
+    ops = {
+        "insert": insert_hops,
+        "lookup": lookup_hops,
+        "update": update_hops,
+        "delete": delete_hops,
+    }
+
+    tasks = [(_plot_heatmaps, (out_dir, N0, ops))]
+    if hist_jobs:
+        tasks.append((_plot_hists, (out_dir, hist_jobs)))
+    if bar_jobs:
+        tasks.append((_plot_load_bars, (out_dir, bar_jobs)))
+    if box_jobs:
+        tasks.append((_plot_boxes, (out_dir, box_jobs)))
+
+    # the plot groups are independent, so each renders in its own forked
+    # worker (args are int32 arrays / small lists, cheap to pickle); on a
+    # single core or without fork nothing can overlap, so draw in-process
+    workers = min(4, len(tasks), os.cpu_count() or 1)
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+        ) as pool:
+            for fut in [pool.submit(fn, *args) for fn, args in tasks]:
+                fut.result()
+    else:
+        for fn, args in tasks:
+            fn(*args)
@@ -1,5 +1,7 @@
 import math
 import hashlib
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
 
 class BPlusTreeNode:
     def __init__(self, size):
@@ -31,10 +33,25 @@ class BPlusTreeNode:
         self.keys.append([key])
 
 
+def _even_chunks(n, cap):
+    """(lo, hi) slices splitting n items into the fewest chunks of <= cap, evenly sized."""
+    parts = max(1, math.ceil(n / cap))
+    base, extra = divmod(n, parts)
+    lo = 0
+    for i in range(parts):
+        hi = lo + base + (1 if i < extra else 0)
+        yield lo, hi
+        lo = hi
+
+
 class BPlusTree:
     def __init__(self, size):
         self.root = BPlusTreeNode(size)
         self.root.is_leaf = True
+        self._count = 0  # number of stored records, kept up to date by every mutator
+
+    def __len__(self):
+        return self._count
 
     def search(self, value):
         curr = self.root
@@ -48,10 +65,62 @@ class BPlusTree:
     def insert(self, key, value):
         leaf = self.search(value)
         leaf.insert_into_leaf(key, value)
+        self._count += 1
 
         if len(leaf.values) > leaf.size:
             self.split_leaf(leaf)
 
+    def bulk_load(self, keys, values):
+        """
+        Insert many records at once (same convention as insert: keys = record
+        payloads, values = sortable keys). The whole tree, existing items
+        included, is rebuilt bottom-up from the sorted pairs: O(n log n) for the
+        sort instead of n top-down inserts with their splits.
+        """
+        pairs = self.get_all_items()
+        pairs.extend(zip(values, keys))
+        if not pairs:
+            return
+        pairs.sort(key=itemgetter(0))  # stable: equal values keep insertion order
+
+        sorted_values, grouped = [], []
+        for value, key in pairs:
+            if sorted_values and sorted_values[-1] == value:
+                grouped[-1].append(key)
+            else:
+                sorted_values.append(value)
+                grouped.append([key])
+
+        size = self.root.size
+
+        level = []
+        for lo, hi in _even_chunks(len(sorted_values), size):
+            leaf = BPlusTreeNode(size)
+            leaf.is_leaf = True
+            leaf.values = sorted_values[lo:hi]
+            leaf.keys = grouped[lo:hi]
+            if level:
+                level[-1].Next = leaf
+            level.append(leaf)
+        mins = [leaf.values[0] for leaf in level]
+
+        # internal levels: up to size separators -> size + 1 children
+        while len(level) > 1:
+            parents, parent_mins = [], []
+            for lo, hi in _even_chunks(len(level), size + 1):
+                node = BPlusTreeNode(size)
+                node.keys = level[lo:hi]
+                node.values = mins[lo + 1:hi]
+                for child in node.keys:
+                    child.parent = node
+                parents.append(node)
+                parent_mins.append(mins[lo])
+            level, mins = parents, parent_mins
+
+        self.root = level[0]
+        self.root.parent = None
+        self._count = len(pairs)
+
     def split_leaf(self, leaf):
         mid = (leaf.size + 1) // 2
 
@@ -155,11 +224,34 @@ class BPlusTree:
 
         return items
     
+    def range_pop(self, lo, hi):
+        """
+        Remove every record with lo <= key <= hi and return them as
+        [(key, record), ...] in key order. Walks only the leaves that hold the
+        range instead of get_all_items() + one delete per key.
+        """
+        popped = []
+        leaf = self.search(lo)
+        while leaf is not None:
+            n = len(leaf.values)
+            i = bisect_left(leaf.values, lo)
+            j = bisect_right(leaf.values, hi)
+            for key_val, records in zip(leaf.values[i:j], leaf.keys[i:j]):
+                for record in records:
+                    popped.append((key_val, record))
+            del leaf.values[i:j]
+            del leaf.keys[i:j]
+            if j < n:  # a key > hi is left in this leaf
+                break
+            leaf = leaf.Next
+        self._count -= len(popped)
+        return popped
+
     def delete(self, sha_key):
         leaf = self.search(sha_key)
 
         for i, val in enumerate(leaf.values):
             if val == sha_key:
                 leaf.values.pop(i)
-                leaf.keys.pop(i)
+                self._count -= len(leaf.keys.pop(i))
                 return
@@ -1,6 +1,122 @@
 import ast
+import importlib.util
+import json
+
+import numpy as np
 import pandas as pd
 
+from key_hash import DEFAULT_KEY_HASH, key_hasher
+
+# Fields the experiments read back from stored records (lookup/update use
+# popularity, title drives the key). Records are trimmed to these before insert.
+RECORD_COLUMNS = ["id", "title", "popularity"]
+
+
+# Dataset schema: other columns in the CSV are not read at all.
+CSV_COLUMNS = [
+    "id", "title", "adult", "original_language", "origin_country", "release_date",
+    "genre_names", "production_company_names", "budget", "revenue", "runtime",
+    "popularity", "vote_average", "vote_count",
+]
+
+# Text columns read as str up front (no type inference, no mixed-type chunks).
+# release_date is included so both engines hand the same strings to
+# pd.to_datetime; pyarrow would otherwise infer date32 on its own.
+TEXT_COLUMNS = [
+    "title", "original_language", "release_date", "origin_country",
+    "genre_names", "production_company_names",
+]
+
+
+# Rows per chunk when streaming the CSV with pandas' C parser.
+CSV_CHUNK_ROWS = 65_536
+
+# Bytes per record batch when streaming the CSV with pyarrow.
+CSV_BLOCK_BYTES = 1 << 24
+
+
+def _csv_engine() -> str:
+    """pyarrow's multithreaded CSV reader when installed, pandas' C parser otherwise."""
+    return "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+
+
+def _arrow_chunks(file_path: str, usecols: list, dtype: dict):
+    """
+    DataFrames of CSV_BLOCK_BYTES record batches from pyarrow's streaming reader.
+    Nulls follow pd.read_csv: the same NA strings (empty cells included) are
+    null in every column, text ones too, so they come out as NaN, not "".
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    from pandas._libs.parsers import STR_NA_VALUES  # pd.read_csv's default na_values
+
+    reader = pa_csv.open_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=usecols,
+            column_types={c: pa.string() for c in dtype},
+            null_values=sorted(STR_NA_VALUES),
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _read_sample(file_path: str, usecols: list, dtype: dict, max_rows: int, seed: int):
+    """
+    Uniform sample of up to max_rows rows, in file order, without holding the
+    whole file: every row gets a random key and the max_rows smallest keys are
+    kept (bottom-k reservoir). pyarrow streams record batches, the C parser
+    CSV_CHUNK_ROWS at a time; keys are drawn per row in file order, so both
+    keep the same rows. The C parser uses round-trip float parsing, which is
+    correctly rounded like pyarrow's (its default can be one ulp off), so the
+    two engines also give the same values. Returns (df, raw_row_count).
+    """
+    if _csv_engine() == "pyarrow":
+        try:
+            return _sample_chunks(_arrow_chunks(file_path, usecols, dtype), usecols, max_rows, seed)
+        except ValueError:  # pa.ArrowInvalid: a later block doesn't fit the types inferred from the first
+            pass
+    chunks = pd.read_csv(
+        file_path, usecols=usecols, dtype=dtype, chunksize=CSV_CHUNK_ROWS, float_precision="round_trip"
+    )
+    return _sample_chunks(chunks, usecols, max_rows, seed)
+
+
+def _sample_chunks(chunks, usecols: list, max_rows: int, seed: int):
+    rng = np.random.default_rng(seed)
+    parts, part_keys = [], []
+    kept = total = 0
+
+    def compact():
+        df = pd.concat(parts) if len(parts) > 1 else parts[0]
+        keys = np.concatenate(part_keys)
+        if len(df) > max_rows:
+            idx = np.sort(np.argpartition(keys, max_rows)[:max_rows])
+            df, keys = df.iloc[idx], keys[idx]
+        parts[:], part_keys[:] = [df], [keys]
+        return len(df)
+
+    for chunk in chunks:
+        total += len(chunk)
+        parts.append(chunk)
+        part_keys.append(rng.random(len(chunk)))
+        kept += len(chunk)
+        if kept > 2 * max_rows:  # amortized: trim once the buffer doubles
+            kept = compact()
+
+    if not parts:
+        return pd.DataFrame(columns=usecols), 0
+    compact()
+    return parts[0].reset_index(drop=True), total
+
+
+def record_columns(df: pd.DataFrame) -> list:
+    """RECORD_COLUMNS that are present in df (title is always required)."""
+    return [c for c in RECORD_COLUMNS if c in df.columns]
+
 
 def _parse_list_field(val):
     """
@@ -12,7 +128,7 @@ def _parse_list_field(val):
     if isinstance(val, list):
         return val
     try:
-        parsed = ast.literal_eval(val)
+        parsed = _literal_eval(val)
         if isinstance(parsed, list):
             return parsed
         return [str(parsed)]
@@ -20,25 +136,55 @@ def _parse_list_field(val):
         return [str(val)]
 
 
+def _literal_eval(val):
+    """
+    ast.literal_eval, through the C json parser only where that is exact: a
+    list repr with no double quotes or backslashes holds plain single-quoted
+    strings, so swapping ' for " gives the same list. The result is kept only
+    if it is a list of str (json would also accept true/null/escapes that
+    literal_eval treats differently); anything else falls back.
+    """
+    if isinstance(val, str) and val.startswith("[") and '"' not in val and "\\" not in val:
+        try:
+            parsed = json.loads(val.replace("'", '"'))
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, list) and all(type(x) is str for x in parsed):
+            return parsed
+    return ast.literal_eval(val)
+
+
+def hash_titles(titles, m: int = 40, key_hash: str = DEFAULT_KEY_HASH) -> np.ndarray:
+    """
+    Batch version of chord.chord_hash for a title column (Series or sequence):
+    low m bits (1 <= m <= 64) of the key_hash.key_hasher hash, so the two
+    always agree. Returns a uint64 array aligned with titles.
+    """
+    if isinstance(titles, pd.Series):
+        titles = titles.astype(str).tolist()
+    h = key_hasher(m, key_hash)
+    return np.fromiter((h(str(t)) for t in titles), dtype=np.uint64, count=len(titles))
+
+
 def load_and_preprocess_csv(
     file_path: str,
     max_rows: int = 946_460,
     seed: int = 1,
 ) -> pd.DataFrame:
     """
-    Load CSV, keep up to max_rows rows (sample if larger), and do light preprocessing.
+    Load CSV, keep up to max_rows rows (uniform sample if larger, streamed), and do light preprocessing.
 
     Expected columns:
     id, title, adult, original_language, origin_country, release_date,
     genre_names, production_company_names, budget, revenue, runtime,
     popularity, vote_average, vote_count
     """
-    df = pd.read_csv(file_path)
-    print(f"[INFO] Raw rows: {len(df)}")
-
-    # Keep up to max_rows 
-    if len(df) > max_rows:
-        df = df.sample(n=max_rows, random_state=seed).reset_index(drop=True)
+    header = pd.read_csv(file_path, nrows=0).columns
+    usecols = [c for c in CSV_COLUMNS if c in header]
+    dtype = {c: str for c in TEXT_COLUMNS if c in usecols}
+    # Keep up to max_rows (sampled while reading, so memory stays ~max_rows)
+    df, raw_rows = _read_sample(file_path, usecols, dtype, max_rows, seed)
+    print(f"[INFO] Raw rows: {raw_rows}")
 
     # Ensure title exists and is string
     if "title" not in df.columns:
@@ -51,13 +197,13 @@ def load_and_preprocess_csv(
 
     # Parse list-like fields into list columns 
     if "origin_country" in df.columns:
-        df["origin_country_parsed"] = df["origin_country"].apply(_parse_list_field)
+        df["origin_country_parsed"] = df["origin_country"].map(_parse_list_field)
 
     if "genre_names" in df.columns:
-        df["genre_list"] = df["genre_names"].apply(_parse_list_field)
+        df["genre_list"] = df["genre_names"].map(_parse_list_field)
 
     if "production_company_names" in df.columns:
-        df["production_company_list"] = df["production_company_names"].apply(_parse_list_field)
+        df["production_company_list"] = df["production_company_names"].map(_parse_list_field)
 
     print(f"[INFO] Using rows: {len(df)}")
     return df
@@ -0,0 +1,18 @@
+import numpy as np
+
+
+def summary(values):
+    """
+    (n, mean, median, p95, min, max) of a hop sequence, or None if empty.
+    One np.partition at all five order statistics plus one sum, instead of
+    separate median / p95 selections and min / max passes. p95 is the
+    nearest-rank value at round(0.95*(n-1)).
+    """
+    n = len(values)
+    if n == 0:
+        return None
+    a = np.asarray(values)
+    k95 = int(round(0.95 * (n - 1)))
+    lo, hi = (n - 1) // 2, n // 2
+    s = np.partition(a, sorted({0, lo, hi, k95, n - 1}))
+    return n, a.mean(), (s[lo] + s[hi]) / 2, s[k95], s[0], s[n - 1]
@@ -0,0 +1,34 @@
+import hashlib
+
+try:
+    import xxhash
+except ImportError:  # only needed when key_hash="xxh64" is asked for
+    xxhash = None
+
+# Title -> ring key hash. Picked explicitly (never by what happens to be
+# installed), so keys, node loads and hop counts are the same in every
+# environment for the same seed and data. Keys only need uniformity, not
+# collision resistance: "blake2b" is stdlib, "xxh64" is faster but needs xxhash.
+KEY_HASHES = ("blake2b", "xxh64")
+DEFAULT_KEY_HASH = "blake2b"
+
+
+def key_hasher(m: int = 40, key_hash: str = DEFAULT_KEY_HASH):
+    """
+    str -> int function giving the low m bits (1 <= m <= 64) of the chosen
+    64-bit hash of the UTF-8 text. The one definition behind chord.chord_hash
+    and data_read.hash_titles.
+    """
+    if not 1 <= m <= 64:
+        raise ValueError("key hashes support 1 <= m <= 64 (uint64 keys).")
+    mask = (1 << m) - 1
+    if key_hash == "xxh64":
+        if xxhash is None:
+            raise ImportError('key_hash="xxh64" needs the xxhash package (pip install xxhash).')
+        xxh64 = xxhash.xxh64_intdigest
+        return lambda s: xxh64(s.encode()) & mask
+    if key_hash == "blake2b":
+        blake2b = hashlib.blake2b
+        from_bytes = int.from_bytes
+        return lambda s: from_bytes(blake2b(s.encode(), digest_size=8).digest(), "big") & mask
+    raise ValueError(f"unknown key_hash {key_hash!r}, expected one of {KEY_HASHES}.")
@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+# the scripts import each other as top-level modules (run from their folders
+# or with PYTHONPATH set); mirror that for the tests
+ROOT = Path(__file__).resolve().parent.parent
+for p in (ROOT, ROOT / "Chord", ROOT / "Pastry", ROOT / "GUI"):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+import data_read
+
+CSV = """id,title,adult,original_language,origin_country,release_date,genre_names,production_company_names,budget,revenue,runtime,popularity,vote_average,vote_count
+0,Movie A,False,en,"['US', 'CA']",2001-01-01,"['Drama', 'Comedy']",['Foo Films'],0,0,90,38.5,8.25,41
+1,,False,,,,,,1000,2000,91,96.75,4.5,940
+2,Movie C,True,fr,[],2001-01-03,"['Drama']",,,4000,92,82.0,9.0,366
+3,Movie D,False,NA,"['GR']",not a date,[],"['Bar', 'Baz']",3000,6000,93,1.125,7.75,12
+"""
+
+# values where pandas' default float parser and pyarrow's differ in the last ulp
+FLOATS = ["31.183145201048546", "54.362499146542286", "3.1703015327969853", "29.271488535475635"]
+
+
+def _load(path, monkeypatch, engine):
+    monkeypatch.setattr(data_read, "_csv_engine", lambda: engine)
+    return data_read.load_and_preprocess_csv(str(path), max_rows=10, seed=1)
+
+
+def test_pyarrow_matches_c_parser_on_empty_text_cells(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "movies.csv"
+    path.write_text(CSV)
+
+    c = _load(path, monkeypatch, "c")
+    arrow = _load(path, monkeypatch, "pyarrow")
+
+    pd.testing.assert_frame_equal(arrow, c)
+    assert c["origin_country_parsed"][1] == []
+    assert c["genre_list"][1] == []
+    assert c["production_company_list"][2] == []
+
+
+def test_pyarrow_matches_c_parser_on_float_values(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    rows = [f"{i},Movie {i},False,en,[],2001-01-01,[],[],0,0,90,{x},{x},1" for i, x in enumerate(FLOATS)]
+    path = tmp_path / "floats.csv"
+    path.write_text(CSV.splitlines()[0] + "\n" + "\n".join(rows) + "\n")
+
+    c = _load(path, monkeypatch, "c")
+    arrow = _load(path, monkeypatch, "pyarrow")
+
+    pd.testing.assert_frame_equal(arrow, c, check_exact=True)
+    assert c["popularity"].tolist() == [float(x) for x in FLOATS]
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from chord import ChordRing, chord_hash
+from data_read import hash_titles
+import key_hash
+
+TITLES = ["Inception", "Amélie", "", "nan", "Movie A", "東京物語", "x" * 300]
+
+
+def _available(name):
+    if name == "xxh64":
+        pytest.importorskip("xxhash")
+    return name
+
+
+@pytest.mark.parametrize("name", key_hash.KEY_HASHES)
+@pytest.mark.parametrize("m", [1, 16, 40, 63, 64])
+def test_hash_titles_matches_chord_hash(name, m):
+    name = _available(name)
+    keys = hash_titles(TITLES, m, key_hash=name)
+    assert keys.dtype == "uint64"
+    assert [int(k) for k in keys] == [chord_hash(t, m, name) for t in TITLES]
+    assert all(int(k) < 2 ** m for k in keys)
+
+
+def test_hash_titles_series_matches_chord_hash():
+    titles = pd.Series(["Inception", None, float("nan"), "Movie A"], dtype=object)
+    keys = hash_titles(titles, 40)
+    assert [int(k) for k in keys] == [chord_hash(t, 40) for t in titles.astype(str)]
+
+
+def test_default_is_blake2b_whatever_is_installed():
+    assert key_hash.DEFAULT_KEY_HASH == "blake2b"
+    assert chord_hash("Inception") == 905627651521
+    assert ChordRing().key_hash == "blake2b"
+
+
+def test_unknown_or_missing_hash_is_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        key_hash.key_hasher(40, "md5")
+    with pytest.raises(ValueError):
+        ChordRing(m=40, key_hash="md5")
+    monkeypatch.setattr(key_hash, "xxhash", None)
+    with pytest.raises(ImportError):
+        key_hash.key_hasher(40, "xxh64")
+
+
+def test_chord_hash_stringifies_unhashable_values():
+    assert chord_hash(["a", "b"]) == chord_hash("['a', 'b']")
+    assert chord_hash({"t": 1}, 16) == chord_hash("{'t': 1}", 16)
@@ -0,0 +1,14 @@
+from chord import ChordRing
+from plot_chord import records_per_node_chord
+
+
+def test_records_per_node_keeps_ids_above_int64():
+    ring = ChordRing(m=64)
+    ids = [5, 2 ** 63, 2 ** 64 - 1]
+    for nid in ids:
+        ring.join_node(nid)
+
+    load = records_per_node_chord(ring)
+
+    assert load.nid.dtype == "uint64"
+    assert [int(n) for n in load.nid] == ids
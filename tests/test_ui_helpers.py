@@ -0,0 +1,39 @@
+from experiments import LookupRow, RunResult
+import ui_helpers
+
+
+class _Tree:
+    """Stands in for a ttk.Treeview; records what gets inserted."""
+
+    def __init__(self):
+        self.rows = []
+
+    def insert(self, parent, index, values):
+        self.rows.append(values)
+
+
+def _render(n_lookups):
+    res = RunResult(
+        name="Chord",
+        summary_rows=[("lookup hops", {"n": n_lookups, "avg": 2.5})],
+        lookup_rows=[LookupRow(title=f"Movie {i}", popularity=1.5, hops=i) for i in range(n_lookups)],
+    )
+    views = {"summary": _Tree(), "lookup": _Tree()}
+    ui_helpers.render_result(views, res)
+    return views
+
+
+def test_render_result_caps_lookup_rows(monkeypatch):
+    monkeypatch.setattr(ui_helpers, "MAX_TREE_ROWS", 5)
+    views = _render(12)
+
+    lookup = views["lookup"].rows
+    assert len(lookup) == 6
+    assert lookup[:5] == [(f"Movie {i}", "1.5", i) for i in range(5)]
+    assert lookup[5] == ("… 7 more rows not shown",)
+    assert len(views["summary"].rows) == 1
+
+
+def test_render_result_shows_everything_under_the_cap():
+    views = _render(3)
+    assert [r[0] for r in views["lookup"].rows] == ["Movie 0", "Movie 1", "Movie 2"]